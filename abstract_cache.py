@@ -0,0 +1,195 @@
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class AbstractCache:
+    """
+    Two-tier cache for abstracts (要約), keyed by document number.
+
+    Tier 1 is a size-bounded in-memory LRU, tier 2 an optional SQLite file that
+    survives restarts. Entries older than `ttl_seconds` are treated as misses in
+    both tiers. Thread-safe, so the sync CLI and the async API can share it.
+
+    "" is a valid entry (the document has no such section); misses are None.
+    Writes reach memory at once and the file from a writer thread, batched into
+    one transaction per drain, so `set` never waits on SQLite.
+    """
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 30 * 24 * 3600, db_path: Optional[str] = None):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        # Serializes the connection between the writer thread and disk reads
+        self._db_lock = threading.Lock()
+        self._writes: "queue.Queue[Optional[Tuple[str, str, float]]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if db_path:
+            directory = os.path.dirname(os.path.abspath(db_path))
+            os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=5.0)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS abstracts ("
+                "document_number TEXT PRIMARY KEY, abstract TEXT NOT NULL, fetched_at REAL NOT NULL)"
+            )
+            self._db.commit()
+            self._writer = threading.Thread(target=self._write_loop, name="abstract-cache-writer", daemon=True)
+            self._writer.start()
+
+    @classmethod
+    def from_env(cls) -> "AbstractCache":
+        return cls(
+            max_entries=int(os.environ.get("ABSTRACT_CACHE_SIZE", "2048")),
+            ttl_seconds=float(os.environ.get("ABSTRACT_CACHE_TTL", str(30 * 24 * 3600))),
+            db_path=os.environ.get("ABSTRACT_CACHE_PATH", "jplatpat_cache.sqlite3") or None,
+        )
+
+    @property
+    def persistent(self) -> bool:
+        """True when there is a SQLite tier behind the memory one."""
+        return self._db is not None
+
+    def _expired(self, fetched_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - fetched_at > self.ttl_seconds
+
+    def _remember(self, key: str, abstract: str, fetched_at: float) -> None:
+        self._entries[key] = (abstract, fetched_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, document_number: str) -> Optional[str]:
+        return self.get_many([document_number])[document_number]
+
+    def get_many(self, document_numbers: Iterable[str], disk: bool = True) -> Dict[str, Optional[str]]:
+        """
+        Cached values for several keys (None for misses), with one disk query for
+        whatever memory does not hold. With disk=False only memory is consulted and,
+        if there is a file, keys it does not hold are not counted as misses (the
+        caller reads them from disk next, e.g. in a worker thread).
+        """
+        found: Dict[str, Optional[str]] = {}
+        missing: List[str] = []
+        with self._lock:
+            for document_number in document_numbers:
+                key = document_number.strip()
+                found[document_number] = None
+                if not key:
+                    continue
+                entry = self._entries.get(key)
+                if entry is not None:
+                    if not self._expired(entry[1]):
+                        self._entries.move_to_end(key)
+                        self.hits += 1
+                        found[document_number] = entry[0]
+                        continue
+                    del self._entries[key]
+                missing.append(document_number)
+        if not missing or (not disk and self.persistent):
+            return found
+        rows = {}
+        if self.persistent:
+            keys = [document_number.strip() for document_number in missing]
+            with self._db_lock:
+                if self._db is not None:
+                    rows = {row[0]: (row[1], row[2]) for row in self._db.execute(
+                        "SELECT document_number, abstract, fetched_at FROM abstracts WHERE document_number IN (%s)" % ",".join("?" * len(keys)),
+                        keys,
+                    )}
+        with self._lock:
+            for document_number in missing:
+                row = rows.get(document_number.strip())
+                if row is not None and not self._expired(row[1]):
+                    self._remember(document_number.strip(), row[0], row[1])
+                    self.disk_hits += 1
+                    found[document_number] = row[0]
+                else:
+                    self.misses += 1
+        return found
+
+    def set(self, document_number: str, abstract: str) -> None:
+        """Cache a fetched value; "" records that the document has no such section."""
+        key = document_number.strip()
+        if not key or abstract is None:
+            return
+        fetched_at = time.time()
+        with self._lock:
+            self._remember(key, abstract, fetched_at)
+        if self._writer is not None:
+            self._writes.put((key, abstract, fetched_at))
+
+    def _write_loop(self) -> None:
+        """Writer thread: drain queued entries into one transaction at a time until close()."""
+        while True:
+            batch = [self._writes.get()]
+            while True:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            entries = [entry for entry in batch if entry is not None]
+            if entries:
+                try:
+                    with self._db_lock:
+                        self._db.executemany(
+                            "INSERT OR REPLACE INTO abstracts (document_number, abstract, fetched_at) VALUES (?, ?, ?)",
+                            entries,
+                        )
+                        self._db.commit()
+                except sqlite3.Error:
+                    pass  # best effort: the entries stay in memory
+            if stop:
+                return
+
+    COUNTER_STATS = ("hits", "disk_hits", "misses", "evictions")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def close(self) -> None:
+        """Flush pending writes and close the file."""
+        if self._writer is not None:
+            self._writes.put(None)
+            self._writer.join()
+            self._writer = None
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_default_cache: Optional[AbstractCache] = None
+_default_lock = threading.Lock()
+
+
+def get_abstract_cache() -> AbstractCache:
+    """Process-wide cache shared by both scrapers, configured from the environment."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = AbstractCache.from_env()
+            atexit.register(_default_cache.close)
+        return _default_cache
@@ -0,0 +1,161 @@
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional
+
+
+class AdmissionRejected(Exception):
+    """A search was not admitted; `status_code` is 429 (client over its share) or 503 (saturated)."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Caps the number of searches scraping at once (`capacity`, normally the browser
+    pool size) and queues the rest in front of the engine.
+
+    Waiting searches are queued per client and admitted round-robin across clients,
+    so one client's burst cannot starve the others. A search is rejected instead of
+    queued when the queue holds `max_queue` searches (503) or its client already has
+    `max_queue_per_client` waiting (429), and gives up (503) when it has waited
+    `wait_fraction` of its own timeout. Rejections carry a Retry-After estimate from
+    the queue depth and the average time a search holds its slot.
+    `capacity` <= 0 disables admission control.
+    """
+
+    def __init__(self, capacity: int, max_queue: int = 0, max_queue_per_client: int = 0, wait_fraction: float = 0.5):
+        self.capacity = capacity
+        self.max_queue = max_queue if max_queue > 0 else max(1, capacity) * 4
+        self.max_queue_per_client = max_queue_per_client if max_queue_per_client > 0 else self.max_queue
+        self.wait_fraction = wait_fraction
+        self._waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._waits_ms: Deque[float] = deque(maxlen=500)
+        self._service_seconds = 0.0
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected_busy = 0
+        self.rejected_client = 0
+        self.timed_out = 0
+
+    @classmethod
+    def from_env(cls, default_capacity: int) -> "AdmissionController":
+        return cls(
+            capacity=int(os.environ.get("ADMISSION_CAPACITY", str(default_capacity))),
+            max_queue=int(os.environ.get("ADMISSION_MAX_QUEUE", "0")),
+            max_queue_per_client=int(os.environ.get("ADMISSION_MAX_QUEUE_PER_CLIENT", "0")),
+            wait_fraction=float(os.environ.get("ADMISSION_WAIT_FRACTION", "0.5")),
+        )
+
+    @property
+    def queued(self) -> int:
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free for a search queued now."""
+        service = self._service_seconds or 5.0
+        return max(1, math.ceil(service * (self.queued + 1) / max(1, self.capacity)))
+
+    async def acquire(self, client: str, timeout_ms: Optional[int] = None, shed: bool = True) -> float:
+        """
+        Wait for a slot and return the admission time (pass it to release()).
+        `timeout_ms` is the search's own timeout; the queue wait is limited to
+        `wait_fraction` of it (None waits indefinitely). With `shed=False` (background
+        work) the search is always queued, never rejected.
+        """
+        started = time.monotonic()
+        if self.capacity <= 0 or (self.in_flight < self.capacity and not self._waiters):
+            self.in_flight += 1
+            return self._admit(started)
+        if shed:
+            if self.queued >= self.max_queue:
+                self.rejected_busy += 1
+                raise AdmissionRejected(503, "Server busy: search queue is full", self.retry_after())
+            if len(self._waiters.get(client, ())) >= self.max_queue_per_client:
+                self.rejected_client += 1
+                raise AdmissionRejected(429, "Too many queued searches for this client", self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(client, deque()).append(waiter)
+        wait_s = timeout_ms * self.wait_fraction / 1000.0 if shed and timeout_ms else None
+        try:
+            await asyncio.wait_for(waiter, wait_s)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as this search gave up; pass it on
+                self.release(time.monotonic())
+            else:
+                self._discard(client, waiter)
+            if isinstance(exc, asyncio.TimeoutError):
+                self.timed_out += 1
+                raise AdmissionRejected(503, "Server busy: timed out waiting in the search queue", self.retry_after()) from None
+            raise
+        return self._admit(started)
+
+    def _admit(self, started: float) -> float:
+        now = time.monotonic()
+        self.admitted += 1
+        self._waits_ms.append((now - started) * 1000.0)
+        return now
+
+    def _discard(self, client: str, waiter: asyncio.Future) -> None:
+        waiters = self._waiters.get(client)
+        if waiters is not None and waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                del self._waiters[client]
+
+    def release(self, admitted_at: float) -> None:
+        """Free a slot, handing it straight to the next client in round-robin order."""
+        held = time.monotonic() - admitted_at
+        self._service_seconds = held if not self._service_seconds else 0.8 * self._service_seconds + 0.2 * held
+        while self._waiters:
+            client, waiters = next(iter(self._waiters.items()))
+            waiter = waiters.popleft()
+            if waiters:
+                self._waiters.move_to_end(client)
+            else:
+                del self._waiters[client]
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def admit(self, client: str, timeout_ms: Optional[int] = None, shed: bool = True):
+        admitted_at = await self.acquire(client, timeout_ms, shed)
+        try:
+            yield
+        finally:
+            self.release(admitted_at)
+
+    COUNTER_STATS = ("admitted", "rejected_busy", "rejected_client", "timed_out")
+
+    def stats(self) -> Dict[str, float]:
+        waits = sorted(self._waits_ms)
+
+        def percentile(pct: float) -> float:
+            if not waits:
+                return 0.0
+            return round(waits[max(0, min(len(waits) - 1, math.ceil(pct / 100.0 * len(waits)) - 1))], 1)
+
+        return {
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "clients_waiting": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected_busy": self.rejected_busy,
+            "rejected_client": self.rejected_client,
+            "timed_out": self.timed_out,
+            "wait_p50_ms": percentile(50),
+            "wait_p95_ms": percentile(95),
+            "service_avg_ms": round(self._service_seconds * 1000.0, 1),
+        }
@@ -1,23 +1,150 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
-from typing import Optional, Dict
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, Field, field_validator
+from typing import Callable, Optional, Dict, List
+import orjson
 import uvicorn
-from jplatpat_scraper_async import search_jplatpat_async
+import metrics
+from abstract_cache import AbstractCache, get_abstract_cache
+from admission import AdmissionController, AdmissionRejected
+from browser_pool import BrowserPool
+from jobs import JobRunner, JobStore
+from jplatpat_common import parse_fields, project_row, to_columns
+from jplatpat_scraper_async import collect_search_events, iter_search_jplatpat_async
+from local_index import get_local_index, index_events
+from readiness import LatencyTracker, get_latency_tracker
+from resource_blocking import ResourcePolicy, get_resource_policy
+from result_cache import QueryResultCache
+from watches import UnknownWatch, WatchStore, run_watch
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the shared browser pool once per process and close it on shutdown."""
+    pool = None
+    if os.environ.get("BROWSER_POOL_ENABLED", "true").lower() in ("1", "true", "yes"):
+        pool = BrowserPool.from_env()
+        await pool.start()
+    app.state.browser_pool = pool
+    app.state.result_cache = QueryResultCache.from_env()
+    # Global cap on batch searches running at once, across all /search/batch calls
+    app.state.batch_semaphore = asyncio.Semaphore(
+        int(os.environ.get("BATCH_CONCURRENCY", str(pool.size if pool is not None else 2)))
+    )
+    # Searches scraping at once, sized to browser capacity; the rest queue or are shed
+    admission = AdmissionController.from_env(pool.size if pool is not None else 2)
+    app.state.admission = admission
+    job_store = JobStore.from_env()
+    job_store.prune(float(os.environ.get("JOB_RETENTION_SECONDS", str(7 * 24 * 3600))))
+    job_runner = JobRunner(
+        job_store,
+        # Background jobs queue for capacity like everyone else but are never shed
+        lambda request: _admitted_search(SearchRequest(**request), "jobs", shed=False),
+        workers=int(os.environ.get("JOB_WORKERS", "1")),
+        flush_interval=float(os.environ.get("JOB_FLUSH_INTERVAL", "1.0")),
+    )
+    job_runner.start()
+    app.state.job_runner = job_runner
+    watch_store = WatchStore.from_env()
+    app.state.watch_store = watch_store
+
+    metrics.register_stats("browser_pool", lambda: pool.stats() if pool is not None else None, BrowserPool.COUNTER_STATS)
+    metrics.register_stats("abstract_cache", lambda: get_abstract_cache().stats(), AbstractCache.COUNTER_STATS)
+    metrics.register_stats("result_cache", app.state.result_cache.stats, QueryResultCache.COUNTER_STATS)
+    metrics.register_stats("readiness", get_latency_tracker().stats, LatencyTracker.COUNTER_STATS)
+    metrics.register_stats("resource_blocking", lambda: policy.stats() if (policy := get_resource_policy()) is not None else None, ResourcePolicy.COUNTER_STATS)
+    metrics.register_stats("jobs", lambda: {"queue": job_runner.queued})
+    metrics.register_stats("admission", admission.stats, AdmissionController.COUNTER_STATS)
+    metrics.register_stats("local_index", lambda: index.stats() if (index := get_local_index()) is not None else None)
+    try:
+        yield
+    finally:
+        await job_runner.stop()
+        job_store.close()
+        watch_store.close()
+        if pool is not None:
+            await pool.close()
+
+
+class ORJSONResponse(Response):
+    """JSON response serialized with orjson, several times faster than json.dumps on large row lists."""
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+
+class StreamAwareGZipMiddleware(GZipMiddleware):
+    """
+    GZip for everything except streaming routes: many Starlette versions buffer a
+    compressed stream inside the gzip file, which would hold back the first rows.
+    """
+
+    def __init__(self, app, uncompressed_paths: tuple = (), **kwargs):
+        super().__init__(app, **kwargs)
+        self.uncompressed_paths = uncompressed_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in self.uncompressed_paths:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
 
 app = FastAPI(
     title="J-PlatPat Search API",
     description="API for searching Japanese patent database (J-PlatPat)",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
+# Result rows (abstracts, claims) compress well; small responses are sent as is
+app.add_middleware(
+    StreamAwareGZipMiddleware,
+    uncompressed_paths=("/search/stream",),
+    minimum_size=int(os.environ.get("GZIP_MINIMUM_SIZE", "1024")),
 )
 
+# Header naming the client for fair queuing; the peer address is used when absent
+ADMISSION_CLIENT_HEADER = os.environ.get("ADMISSION_CLIENT_HEADER", "X-Client-Id")
+
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    return ORJSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail, "retry_after": exc.retry_after},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+def _client_id(http_request: Request) -> str:
+    return http_request.headers.get(ADMISSION_CLIENT_HEADER) or (http_request.client.host if http_request.client else "unknown")
+
 
 class SearchRequest(BaseModel):
     query: str = Field(..., description="Search query string")
-    limit: int = Field(default=10, ge=1, le=100, description="Maximum number of results to return")
+    limit: int = Field(default=10, ge=1, le=3000, description="Maximum number of results to return; result pages are walked as needed")
+    offset: int = Field(default=0, ge=0, description="Number of hits to skip (use next_offset from a previous response to continue)")
     timeout: int = Field(default=20000, ge=5000, le=60000, description="Timeout in milliseconds")
     fetch_abstract: bool = Field(default=True, description="Whether to fetch abstract (要約) for each patent")
+    fetch_claims: bool = Field(default=False, description="Also return the claims (特許請求の範囲) from the same detail page; needs fetch_abstract")
     headless: bool = Field(default=True, description="Run browser in headless mode")
+    use_cache: bool = Field(default=True, description="Serve recent identical searches from the result cache")
+    include_timings: bool = Field(default=False, description="Add per-stage timings (milliseconds) of the scrape to the response")
+    fields: Optional[List[str]] = Field(default=None, description="Only extract and return these row fields, e.g. [\"document_number\", \"invention_title\"]; detail pages are only opened for abstract / claims")
+    format: str = Field(default="rows", pattern="^(rows|columnar)$", description="rows: a list of row objects; columnar: one array per field in `columns`")
+
+    @field_validator("fields")
+    @classmethod
+    def _check_fields(cls, value: Optional[List[str]]) -> Optional[List[str]]:
+        names = parse_fields(value)
+        return list(names) if names is not None else None
 
     model_config = {
         "json_schema_extra": {
@@ -36,7 +163,32 @@ class SearchResponse(BaseModel):
     query: str
     message: str
     count: int
-    rows: list
+    offset: int = 0
+    next_offset: Optional[int] = None
+    rows: Optional[list] = None
+    columns: Optional[Dict[str, list]] = None
+    cached: bool = False
+    cache_age_seconds: float = 0.0
+    timings: Optional[Dict[str, float]] = None
+
+
+class BatchSearchRequest(BaseModel):
+    searches: List[SearchRequest] = Field(..., min_length=1, max_length=100, description="Searches to run; same fields as POST /search")
+
+
+class BatchSearchItem(BaseModel):
+    index: int
+    query: str
+    ok: bool
+    result: Optional[SearchResponse] = None
+    error: Optional[str] = None
+
+
+class BatchSearchResponse(BaseModel):
+    count: int
+    succeeded: int
+    failed: int
+    results: List[BatchSearchItem]
 
 
 @app.get("/")
@@ -47,8 +199,17 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "/search": "POST - Search patents",
+            "/search/stream": "POST - Search patents, streaming rows as NDJSON or SSE",
+            "/search/batch": "POST - Run many searches in parallel",
+            "/jobs": "POST - Submit a search job; GET - List recent jobs",
+            "/jobs/{job_id}": "GET - Job status, progress and (partial) rows",
+            "/watches": "POST - Save a query as a watch; GET - List watches",
+            "/watches/{watch_id}": "GET - Watch details and seen documents; DELETE - Remove a watch",
+            "/watches/{watch_id}/run": "POST - Re-run a watch, returning only new documents and status changes",
+            "/local-search": "GET - Search rows collected so far in the local full-text index",
             "/docs": "GET - API documentation",
-            "/health": "GET - Health check"
+            "/health": "GET - Health check",
+            "/metrics": "GET - Prometheus metrics"
         }
     }
 
@@ -56,35 +217,385 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy"}
+    pool = app.state.browser_pool
+    policy = get_resource_policy()
+    return {
+        "status": "healthy",
+        "browser_pool": pool.stats() if pool is not None else None,
+        "abstract_cache": get_abstract_cache().stats(),
+        "result_cache": app.state.result_cache.stats(),
+        "resource_blocking": policy.stats() if policy is not None else None,
+        "readiness": get_latency_tracker().stats(),
+        "admission": app.state.admission.stats(),
+        "jobs": {**app.state.job_runner.store.counts(), "queue": app.state.job_runner.queued},
+    }
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus metrics: per-stage latency histograms, abstract outcomes, cache and pool counters"""
+    body, content_type = metrics.render_latest()
+    return Response(content=body, media_type=content_type)
+
+
+async def _browser_search(request: SearchRequest, shared_abstracts: Optional[Dict[str, asyncio.Future]] = None, abstract_filter: Optional[Callable[[str], bool]] = None):
+    """Playwright event stream, on a pooled context when possible."""
+    pool = app.state.browser_pool
+    # The pool runs headless; headful debugging requests get their own browser
+    if pool is not None and request.headless:
+        async with pool.lease() as context:
+            async for event in iter_search_jplatpat_async(
+                query=request.query,
+                row_limit=request.limit,
+                timeout_ms=request.timeout,
+                fetch_abstract=request.fetch_abstract,
+                context=context,
+                offset=request.offset,
+                shared_abstracts=shared_abstracts,
+                fetch_claims=request.fetch_claims,
+                abstract_filter=abstract_filter,
+                fields=request.fields
+            ):
+                yield event
+    else:
+        async for event in iter_search_jplatpat_async(
+            query=request.query,
+            headless=request.headless,
+            row_limit=request.limit,
+            timeout_ms=request.timeout,
+            fetch_abstract=request.fetch_abstract,
+            offset=request.offset,
+            shared_abstracts=shared_abstracts,
+            fetch_claims=request.fetch_claims,
+            abstract_filter=abstract_filter,
+            fields=request.fields
+        ):
+            yield event
+
+
+async def _stream_search(request: SearchRequest, shared_abstracts: Optional[Dict[str, asyncio.Future]] = None, abstract_filter: Optional[Callable[[str], bool]] = None):
+    """
+    Event stream for one search. Feeds /metrics and the local full-text index.
+    `abstract_filter` restricts abstract fetching to the document numbers it accepts.
+    """
+    try:
+        async for event in index_events(_browser_search(request, shared_abstracts, abstract_filter)):
+            metrics.observe_event(event)
+            yield event
+    except Exception:
+        metrics.observe_failure()
+        raise
+
+
+async def _admitted_search(request: SearchRequest, client: str, shed: bool = True, shared_abstracts: Optional[Dict[str, asyncio.Future]] = None, abstract_filter: Optional[Callable[[str], bool]] = None):
+    """_stream_search once the admission controller grants a slot (raises AdmissionRejected)."""
+    async with app.state.admission.admit(client, request.timeout, shed=shed):
+        async for event in _stream_search(request, shared_abstracts, abstract_filter):
+            yield event
+
+
+async def _run_search(request: SearchRequest, client: str, shared_abstracts: Optional[Dict[str, asyncio.Future]] = None) -> Dict[str, object]:
+    """Run one admitted scrape and collect it into a result dict (always with timings)."""
+    return await collect_search_events(
+        _admitted_search(request, client, shared_abstracts=shared_abstracts),
+        request.query,
+        offset=request.offset,
+        include_timings=True
+    )
+
+
+def _shape_rows(result: Dict[str, object], fields: Optional[List[str]], fmt: str) -> Dict[str, object]:
+    """Apply the request's field projection and response format to a result with "rows"."""
+    rows = [project_row(row, fields) for row in result["rows"]]
+    if fmt == "columnar":
+        result = {key: value for key, value in result.items() if key != "rows"}
+        result["columns"] = to_columns(rows, fields)
+        return result
+    return {**result, "rows": rows}
+
+
+async def _cached_search(request: SearchRequest, client: str, shared_abstracts: Optional[Dict[str, asyncio.Future]] = None) -> Dict[str, object]:
+    """
+    Run a search through the result cache; adds cached / cache_age_seconds and applies
+    fields / format. Only cache misses go through admission control.
+    """
+    if request.use_cache:
+        cache: QueryResultCache = app.state.result_cache
+        key = cache.make_key(request.query, request.limit, request.fetch_abstract, request.offset, request.fetch_claims, request.fields)
+        result, cached, age = await cache.get_or_fetch(key, lambda: _run_search(request, client, shared_abstracts))
+    else:
+        result, cached, age = await _run_search(request, client, shared_abstracts), False, 0.0
+    result = _shape_rows({**result, "cached": cached, "cache_age_seconds": round(age, 3)}, request.fields, request.format)
+    if not request.include_timings:
+        result.pop("timings", None)
+    return result
 
 
 @app.post("/search", response_model=SearchResponse)
-async def search_patents(request: SearchRequest):
+async def search_patents(request: SearchRequest, http_request: Request):
     """
     Search J-PlatPat database for patents
     
     - **query**: Search query string (required)
-    - **limit**: Maximum number of results (1-100, default: 10)
+    - **limit**: Maximum number of results (1-3000, default: 10); subsequent result pages are loaded as needed
+    - **offset**: Number of hits to skip (default: 0); responses carry `next_offset` to continue from
     - **timeout**: Timeout in milliseconds (5000-60000, default: 20000)
     - **fetch_abstract**: Fetch abstract for each patent (default: True)
+    - **fetch_claims**: Also return claims (特許請求の範囲) from the same detail page (default: False)
     - **headless**: Run browser in headless mode (default: True)
+    - **use_cache**: Reuse a recent identical result and join identical in-flight searches (default: True)
+    - **include_timings**: Add per-stage timings of the scrape in milliseconds (default: False)
+    - **fields**: Only extract and return these row fields (default: all)
+    - **format**: `rows` (default) or `columnar` (`columns`: one array per field instead of `rows`)
+    
+    When all scraping slots are busy the search waits in a per-client fair queue for at
+    most half its `timeout`; it is rejected with 503 (queue full or wait exceeded) or 429
+    (too many queued searches from this client, see `X-Client-Id`), with `Retry-After`.
     """
     try:
-        result = await search_jplatpat_async(
-            query=request.query,
-            headless=request.headless,
-            row_limit=request.limit,
-            timeout_ms=request.timeout,
-            fetch_abstract=request.fetch_abstract
-        )
-        return JSONResponse(content=result)
+        return ORJSONResponse(content=await _cached_search(request, _client_id(http_request)))
+    except AdmissionRejected:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+
+@app.post("/search/batch", response_model=BatchSearchResponse)
+async def search_patents_batch(request: BatchSearchRequest, http_request: Request):
+    """
+    Run many searches in parallel
+    
+    - **searches**: List of search requests (1-100), each with the same fields as POST /search
+    
+    Searches share the browser pool under a global concurrency limit (`BATCH_CONCURRENCY`).
+    A document appearing in several searches has its abstract fetched once. A failing
+    search is reported in its own item (`ok: false`, `error`) without failing the batch,
+    including searches shed by admission control.
+    """
+    shared_abstracts: Dict[str, asyncio.Future] = {}
+    semaphore: asyncio.Semaphore = app.state.batch_semaphore
+    client = _client_id(http_request)
+
+    async def run(index: int, search: SearchRequest) -> Dict[str, object]:
+        async with semaphore:
+            try:
+                result = await _cached_search(search, client, shared_abstracts)
+                return {"index": index, "query": search.query, "ok": True, "result": result, "error": None}
+            except Exception as e:
+                return {"index": index, "query": search.query, "ok": False, "result": None, "error": f"Search failed: {str(e)}"}
+
+    items = await asyncio.gather(*(run(index, search) for index, search in enumerate(request.searches)))
+    succeeded = sum(1 for item in items if item["ok"])
+    return ORJSONResponse(content={
+        "count": len(items),
+        "succeeded": succeeded,
+        "failed": len(items) - succeeded,
+        "results": items,
+    })
+
+
+def _encode_event(event: Dict[str, object], fmt: str) -> bytes:
+    data = orjson.dumps(event)
+    if fmt == "sse":
+        return b"event: " + event["event"].encode() + b"\ndata: " + data + b"\n\n"
+    return data + b"\n"
+
+
+def _project_event(event: Dict[str, object], fields: Optional[List[str]]) -> Dict[str, object]:
+    if fields is None:
+        return event
+    if event["event"] == "row":
+        return {**event, "row": project_row(event["row"], fields)}
+    if event["event"] == "abstract":
+        return {key: value for key, value in event.items() if key in ("event", "index", "document_number") or key in fields}
+    return event
+
+
+@app.post("/search/stream")
+async def search_patents_stream(request: SearchRequest, http_request: Request, format: str = Query(default="ndjson", pattern="^(ndjson|sse)$")):
+    """
+    Search J-PlatPat and stream results while scraping continues
+    
+    Takes the same body as POST /search. Events, one per line (NDJSON) or per SSE message:
+    - **meta**: query and result message
+    - **row**: a result row, sent as soon as the table is read (`abstract_status` is `pending` while its abstract is fetched); limited to `fields` when given
+    - **abstract**: abstract for row `index`, sent as each detail page completes
+    - **done**: total row count
+    - **error**: the search failed; no further events follow
+    
+    Admission is decided before streaming starts (429/503 with `Retry-After`, as for /search).
+    """
+    client = _client_id(http_request)
+    admission: AdmissionController = app.state.admission
+    admitted_at = await admission.acquire(client, request.timeout)
+    released = False
+
+    def release() -> None:
+        # From the body, or after the response if the body never ran (client gone)
+        nonlocal released
+        if not released:
+            released = True
+            admission.release(admitted_at)
+
+    async def body():
+        try:
+            async for event in _stream_search(request):
+                yield _encode_event(_project_event(event, request.fields), format)
+        except Exception as e:
+            yield _encode_event({"event": "error", "detail": f"Search failed: {str(e)}"}, format)
+        finally:
+            release()
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(body(), media_type=media_type, background=BackgroundTask(release))
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: SearchRequest):
+    """
+    Submit a search as a background job and return immediately
+    
+    Takes the same body as POST /search. Poll GET /jobs/{job_id} for progress and rows.
+    Jobs and their rows are stored on disk and resumed after a restart.
+    """
+    job_runner: JobRunner = app.state.job_runner
+    job_id = job_runner.submit(request.model_dump())
+    return {"job_id": job_id, "status": "queued"}
+
+
+@app.get("/jobs")
+async def list_jobs(limit: int = Query(default=50, ge=1, le=500)):
+    """List the most recent jobs"""
+    return {"jobs": app.state.job_runner.store.list_jobs(limit)}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, include_rows: bool = True):
+    """
+    Job status and results
+    
+    - **status**: queued, running, succeeded or failed
+    - **progress**: rows read so far and abstracts still pending
+    - **rows**: rows collected so far (complete once succeeded); omit with `include_rows=false`
+    """
+    job = app.state.job_runner.store.get(job_id, include_rows=include_rows)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    if include_rows:
+        job = _shape_rows(job, job["request"].get("fields"), job["request"].get("format", "rows"))
+    return ORJSONResponse(content=job)
+
+
+@app.get("/local-search")
+async def local_search(
+    q: str = Query(default="", description="Terms (space separated, all must match) searched in title, applicant, abstract, claims and FI codes"),
+    applicant: str = Query(default="", description="Applicant contains"),
+    status: str = Query(default="", description="Status contains"),
+    date_from: str = Query(default="", description="Earliest date, e.g. 2020-01-01 (inclusive)"),
+    date_to: str = Query(default="", description="Latest date, e.g. 2023-12-31 (inclusive)"),
+    date_field: str = Query(default="publication_date", pattern="^(application_date|publication_date)$", description="Date the range applies to"),
+    limit: int = Query(default=50, ge=1, le=1000),
+    offset: int = Query(default=0, ge=0),
+):
+    """
+    Search the rows collected by earlier scrapes, without opening J-PlatPat
+    
+    Every row returned by /search, /search/batch, /search/stream, jobs and watches is
+    stored in a local SQLite FTS5 (trigram) index. Terms of 3+ characters use the index
+    and results are ranked by relevance; shorter terms are matched by substring scan.
+    `total` is the number of matching rows, `took_ms` the query time.
+    """
+    index = get_local_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Local index is disabled (LOCAL_INDEX_ENABLED)")
+    result = await asyncio.to_thread(
+        index.search, q, applicant=applicant, status=status, date_from=date_from, date_to=date_to,
+        date_field=date_field, limit=limit, offset=offset
+    )
+    return ORJSONResponse(content=result)
+
+
+class WatchRequest(BaseModel):
+    query: str = Field(..., description="Search query string to watch")
+    name: str = Field(default="", description="Display name (defaults to the query)")
+    limit: int = Field(default=100, ge=1, le=3000, description="Number of hits compared on each run")
+    timeout: int = Field(default=20000, ge=5000, le=60000, description="Timeout in milliseconds")
+    fetch_abstract: bool = Field(default=True, description="Fetch the abstract (要約) of newly seen documents")
+    fetch_claims: bool = Field(default=False, description="Also fetch the claims (特許請求の範囲) of newly seen documents")
+
+
+@app.post("/watches", status_code=201)
+async def create_watch(request: WatchRequest):
+    """
+    Save a query as a watch
+    
+    Run it with POST /watches/{watch_id}/run. The first run reports every hit as new;
+    later runs report only documents not seen before and status changes of known ones.
+    """
+    store: WatchStore = app.state.watch_store
+    watch_id = await asyncio.to_thread(store.create, request.model_dump(exclude={"name"}), request.name)
+    return ORJSONResponse(status_code=201, content=await asyncio.to_thread(store.get, watch_id))
+
+
+@app.get("/watches")
+async def list_watches():
+    """List saved watches"""
+    return {"watches": await asyncio.to_thread(app.state.watch_store.list_watches)}
+
+
+@app.get("/watches/{watch_id}")
+async def get_watch(watch_id: str, include_documents: bool = False):
+    """
+    Watch details
+    
+    - **documents**: number of documents seen so far
+    - **include_documents**: also return every seen document with its last known row
+    """
+    store: WatchStore = app.state.watch_store
+    watch = await asyncio.to_thread(store.get, watch_id)
+    if watch is None:
+        raise HTTPException(status_code=404, detail=f"Watch not found: {watch_id}")
+    if include_documents:
+        watch["seen_documents"] = await asyncio.to_thread(store.documents, watch_id)
+    return ORJSONResponse(content=watch)
+
+
+@app.delete("/watches/{watch_id}")
+async def delete_watch(watch_id: str):
+    """Delete a watch and the documents it has seen"""
+    if not await asyncio.to_thread(app.state.watch_store.delete, watch_id):
+        raise HTTPException(status_code=404, detail=f"Watch not found: {watch_id}")
+    return {"watch_id": watch_id, "deleted": True}
+
+
+@app.post("/watches/{watch_id}/run")
+async def run_watch_endpoint(watch_id: str, http_request: Request):
+    """
+    Re-run a watch and return only the delta since its last run
+    
+    - **new**: rows of documents not seen before (abstracts are fetched for these, and
+      again for known documents whose earlier fetch timed out or failed)
+    - **status_changes**: known documents whose status changed (`old_status`, `new_status`, `row`)
+    - **abstract_updates**: rows of known documents whose earlier abstract fetch timed out or
+      failed and that this run fetched (`abstract_status` `ok` or `none`)
+    - **count**: total hits compared in this run
+    """
+    client = _client_id(http_request)
+
+    def search(request: Dict[str, object], abstract_filter: Callable[[str], bool]):
+        return _admitted_search(SearchRequest(**request), client, abstract_filter=abstract_filter)
+
+    try:
+        return ORJSONResponse(content=await run_watch(app.state.watch_store, watch_id, search))
+    except UnknownWatch:
+        raise HTTPException(status_code=404, detail=f"Watch not found: {watch_id}")
+    except AdmissionRejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
 
 if __name__ == "__main__":
-    import os
     port = int(os.environ.get("PORT", 8080))
     uvicorn.run(
         app,
@@ -0,0 +1,337 @@
+"""
+Local stand-in for the parts of J-PlatPat the scrapers depend on.
+
+Serves a small single-page app at /s0100 with the same element ids as the real
+simple search screen (input#s01_srchCondtn_txtSimpleSearch, a#s01_srchBtn_btnSearch,
+#patentUtltyIntnlDocLst_searchResultMsg, table#patentUtltyIntnlSimpleBibLst and a
+next-page button), and detail pages at the fixed address /c1800/PU/<doc id>/11/ja
+whose text contains (57)【要約】 and 【特許請求の範囲】. Latency is injectable per
+endpoint, so scraper behaviour under a slow site can be measured offline.
+
+Run standalone:
+    python benchmarks/fixture_server.py --port 8765 --detail-latency 300
+then point the scrapers at it with JPLATPAT_URL=http://127.0.0.1:8765/s0100
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+PAGE_SIZE = 50
+
+# Queries containing one of these return zero hits
+ZERO_HIT_MARKERS = ("nohit", "該当なし")
+
+ZERO_HIT_MESSAGE = "該当する文献は見つかりませんでした。"
+
+SEARCH_PAGE = """<!DOCTYPE html>
+<html lang="ja">
+<head>
+<meta charset="utf-8">
+<title>J-PlatPat stand-in</title>
+<link rel="stylesheet" href="/static/app.css">
+</head>
+<body>
+<div id="app"></div>
+<script src="/static/app.js"></script>
+</body>
+</html>
+"""
+
+SEARCH_APP_JS = r"""
+(function () {
+    const app = document.getElementById("app");
+    app.innerHTML =
+        '<input id="s01_srchCondtn_txtSimpleSearch" type="text">' +
+        '<a id="s01_srchBtn_btnSearch" href="javascript:void(0)">検索</a>' +
+        '<div id="results"></div>';
+    const results = document.getElementById("results");
+    let query = "";
+
+    function cells(row, idx) {
+        return '<th scope="row"><p>' + row.no + '</p></th>' +
+            '<td><a href="javascript:void(0)" class="doc-link" data-url="' + row.url + '">' + row.document_number + '</a></td>' +
+            '<td>' + row.application_number + '</td>' +
+            '<td>' + row.application_date + '</td>' +
+            '<td>' + row.publication_date + '</td>' +
+            '<td>' + row.invention_title + '</td>' +
+            '<td>' + row.applicant + '</td>' +
+            '<td>' + row.status.map((s) => '<label>' + s + '</label>').join("") + '</td>' +
+            '<td>' + row.fi_codes.map((c) => '<a href="javascript:void(0)">' + c + '</a>').join(" ") + '</td>' +
+            '<td><a href="javascript:void(0)">経過情報</a> ' +
+            '<a id="patentUtltyIntnlSimpleBibLst_tableView_url' + idx + '" href="javascript:void(0)">URL</a></td>';
+    }
+
+    function render(data) {
+        if (!data.total) {
+            results.innerHTML = '<p id="patentUtltyIntnlDocLst_searchResultMsg">' + data.message + '</p>';
+            return;
+        }
+        const rows = data.rows.map((row, idx) => '<tr>' + cells(row, idx) + '</tr>').join("");
+        results.innerHTML =
+            '<p id="patentUtltyIntnlDocLst_searchResultMsg">' + data.message + '</p>' +
+            '<table id="patentUtltyIntnlSimpleBibLst"><tbody>' + rows + '</tbody></table>' +
+            (data.has_next ? '<button id="patentUtltyIntnlSimpleBibLst_btnNext">次へ</button>' : '');
+        results.querySelectorAll("a.doc-link").forEach((link) => {
+            link.addEventListener("click", () => window.open(link.dataset.url, "_blank"));
+        });
+        const next = document.getElementById("patentUtltyIntnlSimpleBibLst_btnNext");
+        if (next) {
+            next.addEventListener("click", () => load(data.page + 1));
+        }
+    }
+
+    function load(page) {
+        fetch("/api/search?q=" + encodeURIComponent(query) + "&page=" + page)
+            .then((response) => response.json())
+            .then(render);
+    }
+
+    document.getElementById("s01_srchBtn_btnSearch").addEventListener("click", () => {
+        query = document.getElementById("s01_srchCondtn_txtSimpleSearch").value;
+        results.innerHTML = "";
+        load(0);
+    });
+})();
+"""
+
+DETAIL_PAGE = """<!DOCTYPE html>
+<html lang="ja">
+<head>
+<meta charset="utf-8">
+<title>{doc_id}</title>
+<link rel="stylesheet" href="/static/app.css">
+</head>
+<body>
+<div id="doc">読み込み中</div>
+<img src="/static/figure.png" alt="">
+<script>
+fetch("/api/detail/{doc_id}")
+    .then((response) => response.text())
+    .then((text) => {{ document.getElementById("doc").innerText = text; }});
+</script>
+</body>
+</html>
+"""
+
+# 1x1 transparent PNG
+FIGURE_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000001e221bc330000000049454e44ae426082"
+)
+
+
+class FixtureConfig:
+    def __init__(self, hits: int = 500, bootstrap_latency_ms: int = 0, search_latency_ms: int = 300,
+                 detail_latency_ms: int = 200, static_latency_ms: int = 50, jitter: float = 0.2,
+                 no_abstract_every: int = 0):
+        self.hits = hits
+        self.bootstrap_latency_ms = bootstrap_latency_ms
+        self.search_latency_ms = search_latency_ms
+        self.detail_latency_ms = detail_latency_ms
+        self.static_latency_ms = static_latency_ms
+        self.jitter = jitter
+        # Every Nth document has no 【要約】 (0 disables)
+        self.no_abstract_every = no_abstract_every
+
+
+def _base_number(query: str) -> int:
+    # Different queries get different document numbers, so abstract caches do not hide detail fetches
+    return zlib.crc32(query.encode("utf-8")) % 800000
+
+
+# Year 0000 in every number: a format the scrapers recognize (特開YYYY-NNNNNN) that
+# no real publication has, so fixture documents cannot be mistaken for real ones
+FIXTURE_YEAR = "0000"
+
+
+def _doc_id(number: int) -> str:
+    return f"JP-{FIXTURE_YEAR}-{number:06d}"
+
+
+def _row(query: str, hit: int, origin: str) -> Dict[str, object]:
+    number = _base_number(query) + hit
+    return {
+        "no": str(hit),
+        "document_number": f"特開{FIXTURE_YEAR}-{number:06d}",
+        "url": f"{origin}/c1800/PU/{_doc_id(number)}/11/ja",
+        "application_number": f"特願{FIXTURE_YEAR}-{number:06d}",
+        "application_date": "2019/01/15",
+        "publication_date": "2020/07/30",
+        "invention_title": f"情報処理装置及びプログラム（{query} {hit}）",
+        "applicant": "株式会社サンプル" if hit % 3 else "サンプル電機株式会社",
+        "status": ["審査請求済"] if hit % 2 else ["審査請求済", "登録"],
+        "fi_codes": ["G06N3/00", "G06F16/00"],
+    }
+
+
+def _detail_text(number: int, config: FixtureConfig) -> str:
+    parts = [
+        "(19)【発行国】日本国特許庁(JP)",
+        "(12)【公報種別】公開特許公報(A)",
+        f"(11)【公開番号】特開{FIXTURE_YEAR}-{number:06d}",
+        "(54)【発明の名称】情報処理装置及びプログラム",
+    ]
+    if not (config.no_abstract_every and number % config.no_abstract_every == 0):
+        parts += [
+            "(57)【要約】",
+            f"【課題】文献{number}の課題を解決する。",
+            "【解決手段】入力データを学習済みモデルに入力し、推論結果を出力する。",
+            "【選択図】図1",
+        ]
+    parts += [
+        "【特許請求の範囲】",
+        "【請求項1】入力部と、推論部と、出力部とを備える情報処理装置。",
+        "【請求項2】請求項1に記載の情報処理装置を制御するプログラム。",
+        "【発明の詳細な説明】",
+        "【技術分野】",
+        "本発明は情報処理装置に関する。" * 50,
+    ]
+    return "\n".join(parts)
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    config: FixtureConfig = FixtureConfig()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _sleep(self, latency_ms: int) -> None:
+        if latency_ms > 0:
+            spread = latency_ms * self.config.jitter
+            time.sleep(max(0.0, latency_ms + random.uniform(-spread, spread)) / 1000.0)
+
+    def _send(self, status: int, content_type: str, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _origin(self) -> str:
+        return f"http://{self.headers.get('Host')}"
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        path = parts.path
+        params = parse_qs(parts.query)
+        if path == "/s0100":
+            self._send(200, "text/html; charset=utf-8", SEARCH_PAGE.encode("utf-8"))
+        elif path == "/static/app.js":
+            # Stands in for the Angular bundle bootstrapping the search screen
+            self._sleep(self.config.bootstrap_latency_ms)
+            self._send(200, "application/javascript; charset=utf-8", SEARCH_APP_JS.encode("utf-8"))
+        elif path == "/static/app.css":
+            self._sleep(self.config.static_latency_ms)
+            self._send(200, "text/css", b"body { font-family: sans-serif; }")
+        elif path == "/static/figure.png":
+            self._sleep(self.config.static_latency_ms)
+            self._send(200, "image/png", FIGURE_PNG)
+        elif path == "/api/search":
+            self._sleep(self.config.search_latency_ms)
+            self._send(200, "application/json", json.dumps(
+                self._search(params.get("q", [""])[0], int(params.get("page", ["0"])[0])),
+                ensure_ascii=False,
+            ).encode("utf-8"))
+        elif path.startswith("/c1800/PU/"):
+            doc_id = path.split("/")[3]
+            self._send(200, "text/html; charset=utf-8", DETAIL_PAGE.format(doc_id=doc_id).encode("utf-8"))
+        elif path.startswith("/api/detail/"):
+            self._sleep(self.config.detail_latency_ms)
+            number = int(path.rsplit("-", 1)[-1])
+            self._send(200, "text/plain; charset=utf-8", _detail_text(number, self.config).encode("utf-8"))
+        else:
+            self._send(404, "text/plain", b"not found")
+
+    def _search(self, query: str, page: int) -> Dict[str, object]:
+        total = 0 if any(marker in query for marker in ZERO_HIT_MARKERS) else self.config.hits
+        if not total:
+            return {"total": 0, "page": 0, "message": ZERO_HIT_MESSAGE, "rows": [], "has_next": False}
+        first = page * PAGE_SIZE + 1
+        last = min(total, first + PAGE_SIZE - 1)
+        rows: List[Dict[str, object]] = [_row(query, hit, self._origin()) for hit in range(first, last + 1)]
+        return {
+            "total": total,
+            "page": page,
+            "message": f"検索結果: {first}-{last} / {total}件",
+            "rows": rows,
+            "has_next": last < total,
+        }
+
+
+class FixtureServer:
+    """Runs the stand-in on a background thread; use as a context manager."""
+
+    def __init__(self, config: Optional[FixtureConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        handler = type("ConfiguredFixtureHandler", (FixtureHandler,), {"config": config or FixtureConfig()})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def search_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/s0100"
+
+    def start(self) -> "FixtureServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "FixtureServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--hits", type=int, default=500, help="Number of hits every query returns")
+    parser.add_argument("--bootstrap-latency", type=int, default=0, help="Delay (ms) before the search screen script loads")
+    parser.add_argument("--search-latency", type=int, default=300, help="Delay (ms) of each result page")
+    parser.add_argument("--detail-latency", type=int, default=200, help="Delay (ms) before a detail page renders its text")
+    parser.add_argument("--static-latency", type=int, default=50, help="Delay (ms) of stylesheets and images")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Random +/- fraction applied to every delay")
+    parser.add_argument("--no-abstract-every", type=int, default=0, help="Every Nth document has no 【要約】 (0: none)")
+
+
+def config_from_args(args: argparse.Namespace) -> FixtureConfig:
+    return FixtureConfig(
+        hits=args.hits,
+        bootstrap_latency_ms=args.bootstrap_latency,
+        search_latency_ms=args.search_latency,
+        detail_latency_ms=args.detail_latency,
+        static_latency_ms=args.static_latency,
+        jitter=args.jitter,
+        no_abstract_every=args.no_abstract_every,
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Serve a local J-PlatPat stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    server = FixtureServer(config_from_args(args), host=args.host, port=args.port)
+    print(f"J-PlatPat stand-in at {server.search_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,280 @@
+"""
+Offline benchmark for the scrapers and the API against the local J-PlatPat stand-in.
+
+    python benchmarks/run_benchmark.py --engines sync async api --iterations 10 --limit 20
+
+Starts benchmarks/fixture_server.py on a free port, points JPLATPAT_URL at it and
+drives search_jplatpat (sync), search_jplatpat_async and POST /search (uvicorn
+subprocess). Reports p50/p95 latency, rows/s and peak RSS of the process tree that
+runs the browsers (Linux /proc; falls back to getrusage elsewhere).
+
+Every store (abstract cache, jobs, watches, local index) is pointed at a temporary
+directory removed afterwards, so fixture documents never reach the real databases;
+the local index is disabled.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fixture_server import FixtureServer, add_config_arguments, config_from_args
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _tree_rss_bytes(root_pid: int) -> Optional[int]:
+    """Resident memory of `root_pid` and all its descendants, or None without /proc."""
+    if not os.path.isdir("/proc"):
+        return None
+    children: Dict[int, List[int]] = {}
+    rss: Dict[int, int] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces; fields after it are fixed
+        fields = stat[stat.rfind(")") + 2:].split()
+        pid, ppid = int(entry), int(fields[1])
+        children.setdefault(ppid, []).append(pid)
+        rss[pid] = int(fields[21]) * PAGE_SIZE
+    total, stack = 0, [root_pid]
+    while stack:
+        pid = stack.pop()
+        total += rss.get(pid, 0)
+        stack.extend(children.get(pid, []))
+    return total
+
+
+class RssSampler(threading.Thread):
+    """Polls the RSS of a process tree and keeps the peak."""
+
+    def __init__(self, pid: int, interval: float = 0.05):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            sample = _tree_rss_bytes(self.pid)
+            if sample is None:
+                return
+            self.peak = max(self.peak, sample)
+            self._stop_event.wait(self.interval)
+
+    def stop(self) -> int:
+        self._stop_event.set()
+        self.join()
+        if not self.peak:
+            # No /proc: ru_maxrss is KiB on Linux, bytes on macOS
+            usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss + resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+            self.peak = usage if sys.platform == "darwin" else usage * 1024
+        return self.peak
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    # Nearest-rank percentile
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(engine: str, samples: List[Tuple[float, int]], errors: List[str], wall_seconds: float, peak_rss: int) -> Dict[str, object]:
+    latencies = [seconds for seconds, _ in samples]
+    rows = sum(count for _, count in samples)
+    return {
+        "engine": engine,
+        "runs": len(samples),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "p50_s": round(percentile(latencies, 50), 3),
+        "p95_s": round(percentile(latencies, 95), 3),
+        "mean_s": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        "rows_per_s": round(rows / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+        "peak_rss_mb": round(peak_rss / (1024 * 1024), 1),
+    }
+
+
+def _timed(call: Callable[[], Dict[str, object]], samples: List[Tuple[float, int]], errors: List[str]) -> None:
+    started = time.perf_counter()
+    try:
+        result = call()
+    except Exception as exc:
+        errors.append(str(exc))
+        return
+    samples.append((time.perf_counter() - started, int(result.get("count", 0))))
+
+
+def bench_sync(args: argparse.Namespace, queries: List[str]) -> Dict[str, object]:
+    from jplatpat_scraper import search_jplatpat
+
+    def run(query: str) -> Dict[str, object]:
+        return search_jplatpat(query, row_limit=args.limit, timeout_ms=args.timeout, fetch_abstract=args.abstract)
+
+    for query in queries[:args.warmup]:
+        _timed(lambda: run(query), [], [])
+    samples: List[Tuple[float, int]] = []
+    errors: List[str] = []
+    sampler = RssSampler(os.getpid())
+    sampler.start()
+    started = time.perf_counter()
+    # The sync engine is strictly sequential
+    for query in queries[args.warmup:]:
+        _timed(lambda: run(query), samples, errors)
+    wall = time.perf_counter() - started
+    return summarize("sync", samples, errors, wall, sampler.stop())
+
+
+def bench_async(args: argparse.Namespace, queries: List[str]) -> Dict[str, object]:
+    from jplatpat_scraper_async import search_jplatpat_async
+
+    async def run_all() -> Tuple[List[Tuple[float, int]], List[str], float]:
+        semaphore = asyncio.Semaphore(args.concurrency)
+        samples: List[Tuple[float, int]] = []
+        errors: List[str] = []
+
+        async def run(query: str, record: bool) -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    result = await search_jplatpat_async(query, row_limit=args.limit, timeout_ms=args.timeout, fetch_abstract=args.abstract)
+                except Exception as exc:
+                    errors.append(str(exc))
+                    return
+                if record:
+                    samples.append((time.perf_counter() - started, int(result.get("count", 0))))
+
+        for query in queries[:args.warmup]:
+            await run(query, record=False)
+        errors.clear()
+        started = time.perf_counter()
+        await asyncio.gather(*(run(query, record=True) for query in queries[args.warmup:]))
+        return samples, errors, time.perf_counter() - started
+
+    sampler = RssSampler(os.getpid())
+    sampler.start()
+    samples, errors, wall = asyncio.run(run_all())
+    return summarize("async", samples, errors, wall, sampler.stop())
+
+
+def _post_json(url: str, payload: Dict[str, object], timeout: float) -> Dict[str, object]:
+    request = urllib.request.Request(
+        url, data=json.dumps(payload).encode("utf-8"), headers={"Content-Type": "application/json"}, method="POST"
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+def bench_api(args: argparse.Namespace, queries: List[str]) -> Dict[str, object]:
+    port = args.api_port
+    base = f"http://127.0.0.1:{port}"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=REPO_ROOT, env=os.environ.copy(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.time() + 60
+        while True:
+            try:
+                urllib.request.urlopen(f"{base}/health", timeout=2).read()
+                break
+            except OSError:
+                if process.poll() is not None or time.time() > deadline:
+                    raise RuntimeError("API server did not start")
+                time.sleep(0.2)
+
+        def run(query: str) -> Dict[str, object]:
+            payload = {"query": query, "limit": args.limit, "timeout": args.timeout, "fetch_abstract": args.abstract, "use_cache": False}
+            return _post_json(f"{base}/search", payload, timeout=args.timeout / 1000.0 + 120)
+
+        for query in queries[:args.warmup]:
+            _timed(lambda: run(query), [], [])
+        samples: List[Tuple[float, int]] = []
+        errors: List[str] = []
+        sampler = RssSampler(process.pid)
+        sampler.start()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            list(executor.map(lambda query: _timed(lambda: run(query), samples, errors), queries[args.warmup:]))
+        wall = time.perf_counter() - started
+        return summarize("api", samples, errors, wall, sampler.stop())
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+ENGINES = {"sync": bench_sync, "async": bench_async, "api": bench_api}
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the J-PlatPat scrapers against a local stand-in")
+    parser.add_argument("--engines", nargs="+", choices=sorted(ENGINES), default=["sync", "async", "api"])
+    parser.add_argument("--iterations", type=int, default=5, help="Measured searches per engine")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured searches before measuring")
+    parser.add_argument("--concurrency", type=int, default=1, help="Concurrent searches (async and api engines)")
+    parser.add_argument("--limit", type=int, default=20, help="Rows per search")
+    parser.add_argument("--timeout", type=int, default=20000, help="Timeout in milliseconds")
+    parser.add_argument("--no-abstract", action="store_false", dest="abstract", help="Do not fetch abstracts")
+    parser.add_argument("--query", default="人工知能", help="Base query; a counter is appended unless --same-query")
+    parser.add_argument("--same-query", action="store_true", help="Repeat one query (measures warm caches)")
+    parser.add_argument("--api-port", type=int, default=8799)
+    parser.add_argument("--output", "-o", help="Also write the results as JSON to this file")
+    add_config_arguments(parser)
+    args = parser.parse_args(argv)
+
+    total = args.warmup + args.iterations
+    queries = [args.query if args.same_query else f"{args.query} {i}" for i in range(total)]
+
+    store_dir = tempfile.mkdtemp(prefix="jplatpat-benchmark-")
+    try:
+        with FixtureServer(config_from_args(args)) as server:
+            # Must be set before the scraper modules are imported (and for the API subprocess)
+            os.environ["JPLATPAT_URL"] = server.search_url
+            # Warm caches persist (for the API subprocess too) only with --same-query
+            os.environ["ABSTRACT_CACHE_PATH"] = os.path.join(store_dir, "cache.sqlite3") if args.same_query else ""
+            os.environ["JOB_STORE_PATH"] = os.path.join(store_dir, "jobs.sqlite3")
+            os.environ["WATCH_STORE_PATH"] = os.path.join(store_dir, "watches.sqlite3")
+            os.environ["LOCAL_INDEX_PATH"] = os.path.join(store_dir, "index.sqlite3")
+            os.environ["LOCAL_INDEX_ENABLED"] = "false"
+            sys.path.insert(0, REPO_ROOT)
+            results = [ENGINES[engine](args, queries) for engine in args.engines]
+    finally:
+        shutil.rmtree(store_dir, ignore_errors=True)
+
+    header = f"{'engine':<8}{'runs':>6}{'errors':>8}{'p50 s':>9}{'p95 s':>9}{'rows/s':>9}{'peak RSS MB':>13}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['engine']:<8}{r['runs']:>6}{r['errors']:>8}{r['p50_s']:>9}{r['p95_s']:>9}{r['rows_per_s']:>9}{r['peak_rss_mb']:>13}")
+        if r["first_error"]:
+            print(f"  first error: {r['first_error']}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 0 if all(not r["errors"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
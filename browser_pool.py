@@ -0,0 +1,291 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Set
+
+from playwright.async_api import async_playwright, Error as PlaywrightError
+
+from jplatpat_scraper_async import LAUNCH_ARGS, discard_search_page, new_context, open_search_page, ready_search_page
+
+# Clears origin storage of a page before it is closed, so the next lease starts clean
+_CLEAR_STORAGE_JS = "() => { try { localStorage.clear(); sessionStorage.clear(); } catch (e) {} }"
+
+
+class PooledContext:
+    """A browser context owned by the pool, together with the browser slot it lives in."""
+
+    def __init__(self, slot: int, browser, context):
+        self.slot = slot
+        self.browser = browser
+        self.context = context
+        self.uses = 0
+        self.warmed_at: Optional[float] = None  # when its ready search page was loaded
+
+    def is_alive(self) -> bool:
+        return self.context is not None and self.browser is not None and self.browser.is_connected()
+
+
+class BrowserPool:
+    """
+    Long-lived pool of Chromium browsers and contexts shared by API requests.
+
+    `browsers` Chromium processes are launched once, each holding `contexts_per_browser`
+    contexts. A request leases one context, and on release the context is reset
+    (cookies, local/session storage, leftover pages). Crashed browsers are detected
+    and relaunched lazily on the next lease of one of their contexts.
+
+    With `cdp_endpoint` (e.g. http://127.0.0.1:9222, see browser_server.py) nothing is
+    launched: each slot connects over CDP to one shared Chromium, so several API worker
+    processes can each lease their own contexts in it. A lost connection is re-established
+    on the next lease, retrying while the browser server restarts.
+
+    With `warm_pages`, every idle context also holds a page already sitting on the
+    J-PlatPat simple search screen (open_search_page), so a search only fills in the
+    query and clicks search. A search leaves its results page behind as the context's
+    search page, and on release the pool keeps it (submitting the next query in the
+    SPA, no reload) and only closes the other pages; the context's cookies and storage
+    then live on until it is replaced after `max_context_uses` leases. A context whose
+    search failed has no such page and gets a fresh one loaded in the background
+    before it becomes idle again, unless leases are waiting. A search page idle for
+    more than `warm_max_age` seconds is not trusted (the site session may have
+    expired) and the search loads the screen itself.
+    """
+
+    def __init__(self, browsers: int = 1, contexts_per_browser: int = 2, headless: bool = True, max_context_uses: int = 50, cdp_endpoint: str = "", connect_retries: int = 10, warm_pages: bool = True, warm_timeout_ms: int = 20000, warm_max_age: float = 600.0):
+        self.browsers_count = max(1, browsers)
+        self.contexts_per_browser = max(1, contexts_per_browser)
+        self.headless = headless
+        self.max_context_uses = max_context_uses
+        self.cdp_endpoint = cdp_endpoint
+        self.connect_retries = max(0, connect_retries)
+        self.warm_pages = warm_pages
+        self.warm_timeout_ms = warm_timeout_ms
+        self.warm_max_age = warm_max_age
+        self._playwright = None
+        self._browsers: List[Optional[object]] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._slot_locks: List[asyncio.Lock] = []
+        self._recycling: Set[asyncio.Task] = set()
+        self._closed = False
+        self.in_use = 0
+        self.waiting = 0
+        self.crashes = 0
+        self.replacements = 0
+        self.warm_leases = 0
+        self.cold_leases = 0
+        self.warm_failures = 0
+
+    @classmethod
+    def from_env(cls) -> "BrowserPool":
+        return cls(
+            browsers=int(os.environ.get("BROWSER_POOL_BROWSERS", "1")),
+            contexts_per_browser=int(os.environ.get("BROWSER_POOL_CONTEXTS", "2")),
+            max_context_uses=int(os.environ.get("BROWSER_POOL_MAX_CONTEXT_USES", "50")),
+            cdp_endpoint=os.environ.get("BROWSER_CDP_ENDPOINT", ""),
+            connect_retries=int(os.environ.get("BROWSER_CONNECT_RETRIES", "10")),
+            warm_pages=os.environ.get("BROWSER_POOL_WARM_PAGES", "true").lower() in ("1", "true", "yes"),
+            warm_timeout_ms=int(os.environ.get("BROWSER_POOL_WARM_TIMEOUT_MS", "20000")),
+            warm_max_age=float(os.environ.get("BROWSER_POOL_WARM_MAX_AGE", "600")),
+        )
+
+    @property
+    def size(self) -> int:
+        return self.browsers_count * self.contexts_per_browser
+
+    async def start(self) -> None:
+        self._playwright = await async_playwright().start()
+        self._idle = asyncio.Queue()
+        self._slot_locks = [asyncio.Lock() for _ in range(self.browsers_count)]
+        for slot in range(self.browsers_count):
+            browser = await self._launch(slot)
+            self._browsers.append(browser)
+            for _ in range(self.contexts_per_browser):
+                context = await new_context(browser)
+                pooled = PooledContext(slot, browser, context)
+                if self.warm_pages:
+                    self._recycle_soon(pooled, reset=False)
+                else:
+                    self._idle.put_nowait(pooled)
+
+    async def close(self) -> None:
+        self._closed = True
+        for task in list(self._recycling):
+            task.cancel()
+        if self._recycling:
+            await asyncio.gather(*self._recycling, return_exceptions=True)
+        for browser in self._browsers:
+            if browser is not None:
+                try:
+                    await browser.close()
+                except Exception:
+                    pass
+        self._browsers = []
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def _launch(self, slot: int):
+        if self.cdp_endpoint:
+            browser = await self._connect()
+        else:
+            browser = await self._playwright.chromium.launch(headless=self.headless, args=LAUNCH_ARGS)
+        browser.on("disconnected", lambda _: self._on_disconnected(slot))
+        return browser
+
+    async def _connect(self):
+        """Connect to the shared browser, waiting (with backoff) while it is not up yet."""
+        for attempt in range(self.connect_retries + 1):
+            try:
+                return await self._playwright.chromium.connect_over_cdp(self.cdp_endpoint)
+            except PlaywrightError:
+                if attempt == self.connect_retries:
+                    raise
+                await asyncio.sleep(min(2.0, 0.25 * (2 ** attempt)))
+
+    def _on_disconnected(self, slot: int) -> None:
+        if not self._closed:
+            self.crashes += 1
+
+    async def _browser_for(self, slot: int):
+        """Return a connected browser for `slot`, relaunching it if it has crashed."""
+        async with self._slot_locks[slot]:
+            browser = self._browsers[slot]
+            if browser is None or not browser.is_connected():
+                if browser is not None:
+                    try:
+                        await browser.close()
+                    except Exception:
+                        pass
+                browser = await self._launch(slot)
+                self._browsers[slot] = browser
+                self.replacements += 1
+            return browser
+
+    async def _replace(self, pooled: PooledContext) -> PooledContext:
+        if pooled.context is not None:
+            discard_search_page(pooled.context)
+        if pooled.context is not None and pooled.browser is not None and pooled.browser.is_connected():
+            try:
+                await pooled.context.close()
+            except Exception:
+                pass
+        browser = await self._browser_for(pooled.slot)
+        context = await new_context(browser)
+        return PooledContext(pooled.slot, browser, context)
+
+    async def _reset(self, pooled: PooledContext) -> bool:
+        """
+        Drop what a request left behind in the context. With `warm_pages` the search
+        page handed back by the request is kept, together with the site session it
+        needs; returns whether it was.
+        """
+        keep = ready_search_page(pooled.context) if self.warm_pages else None
+        if keep is None:
+            discard_search_page(pooled.context)
+        for page in list(pooled.context.pages):
+            if page is keep:
+                continue
+            if keep is None:
+                try:
+                    await page.evaluate(_CLEAR_STORAGE_JS)
+                except PlaywrightError:
+                    pass
+            await page.close()
+        if keep is None:
+            await pooled.context.clear_cookies()
+        return keep is not None
+
+    async def _warm(self, pooled: PooledContext) -> None:
+        """Load the simple search screen in a page of the context, ready for the next lease."""
+        try:
+            await open_search_page(pooled.context, self.warm_timeout_ms)
+            pooled.warmed_at = time.monotonic()
+        except Exception:
+            # The lease still works; its search loads the screen itself
+            self.warm_failures += 1
+
+    async def _drop(self, pooled: PooledContext) -> None:
+        """Close a context that could not be reset (best effort) and mark it for replacement on the next lease."""
+        if pooled.context is not None:
+            discard_search_page(pooled.context)
+            try:
+                await pooled.context.close()
+            except Exception:
+                pass
+        pooled.context = None
+
+    async def _recycle(self, pooled: PooledContext, reset: bool = True) -> None:
+        """
+        Reset (or replace) a released context and make it idle again, keeping its search
+        page or else pre-warming a new one. While leases are waiting a context without a
+        search page goes back cold, so nobody waits for a page load.
+        """
+        try:
+            if reset:
+                if not pooled.is_alive() or pooled.uses >= self.max_context_uses:
+                    pooled = await self._replace(pooled)
+                elif await self._reset(pooled):
+                    pooled.warmed_at = time.monotonic()
+            if pooled.warmed_at is None and self.warm_pages and not self._closed and not self.waiting:
+                await self._warm(pooled)
+        except Exception:
+            await self._drop(pooled)
+        finally:
+            self._idle.put_nowait(pooled)
+
+    def _recycle_soon(self, pooled: PooledContext, reset: bool = True) -> None:
+        task = asyncio.ensure_future(self._recycle(pooled, reset))
+        self._recycling.add(task)
+        task.add_done_callback(self._recycling.discard)
+
+    @asynccontextmanager
+    async def lease(self):
+        """Lease a healthy context for the duration of one request."""
+        if self._idle is None:
+            raise RuntimeError("BrowserPool is not started")
+        self.waiting += 1
+        try:
+            pooled = await self._idle.get()
+        finally:
+            self.waiting -= 1
+        self.in_use += 1
+        try:
+            if not pooled.is_alive():
+                pooled = await self._replace(pooled)
+        except Exception:
+            # Browser (server) unavailable: keep the slot for a later lease to retry
+            self.in_use -= 1
+            pooled.context = None
+            self._idle.put_nowait(pooled)
+            raise
+        if pooled.warmed_at is not None and time.monotonic() - pooled.warmed_at <= self.warm_max_age:
+            self.warm_leases += 1
+        else:
+            discard_search_page(pooled.context)
+            self.cold_leases += 1
+        pooled.warmed_at = None
+        try:
+            pooled.uses += 1
+            yield pooled.context
+        finally:
+            self.in_use -= 1
+            # Reset and re-warm after the request, not during it
+            self._recycle_soon(pooled)
+
+    COUNTER_STATS = ("browser_crashes", "browser_replacements", "warm_leases", "cold_leases", "warm_failures")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": self.size,
+            "idle": self._idle.qsize() if self._idle is not None else 0,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "saturation": round(self.in_use / self.size, 2),
+            "browser_crashes": self.crashes,
+            "browser_replacements": self.replacements,
+            "recycling": len(self._recycling),
+            "warm_leases": self.warm_leases,
+            "cold_leases": self.cold_leases,
+            "warm_failures": self.warm_failures,
+        }
@@ -0,0 +1,70 @@
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+
+from jplatpat_scraper_async import LAUNCH_ARGS
+
+
+def chromium_command(port: int, host: str, user_data_dir: str) -> List[str]:
+    """Headless Chromium (the one Playwright installed) exposing CDP on host:port."""
+    from playwright.sync_api import sync_playwright
+
+    with sync_playwright() as p:
+        executable = p.chromium.executable_path
+    return [
+        executable,
+        "--headless=new",
+        f"--remote-debugging-port={port}",
+        f"--remote-debugging-address={host}",
+        f"--user-data-dir={user_data_dir}",
+        "--no-first-run",
+        "--no-default-browser-check",
+        *LAUNCH_ARGS,
+        "about:blank",
+    ]
+
+
+def main(argv: List[str]) -> int:
+    """
+    Run one shared Chromium for all API worker processes and restart it if it exits.
+    Workers connect to it with BROWSER_CDP_ENDPOINT=http://<host>:<port> and lease
+    their own contexts, so browser memory does not grow with the number of workers.
+    """
+    parser = argparse.ArgumentParser(description="Shared headless Chromium for API workers (Chrome DevTools Protocol)")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("BROWSER_CDP_PORT", "9222")), help="CDP port")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (keep it private: CDP has no authentication)")
+    parser.add_argument("--restart-delay", type=float, default=1.0, help="Seconds to wait before restarting a browser that exited")
+    args = parser.parse_args(argv)
+
+    user_data_dir = tempfile.mkdtemp(prefix="jplatpat-browser-")
+    command = chromium_command(args.port, args.host, user_data_dir)
+    stopping = False
+    process = None
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        if process is not None and process.poll() is None:
+            process.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while not stopping:
+        print(f"starting shared browser on {args.host}:{args.port}", file=sys.stderr, flush=True)
+        process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+        code = process.wait()
+        if stopping:
+            break
+        print(f"browser exited with code {code}; restarting", file=sys.stderr, flush=True)
+        time.sleep(args.restart_delay)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,131 @@
+import asyncio
+import json
+import os
+import sys
+from typing import Dict, IO, Iterable, List, Optional, Sequence, Set
+
+from browser_pool import BrowserPool
+from jplatpat_common import project_row
+from jplatpat_scraper_async import ABSTRACT_PENDING, iter_search_jplatpat_async
+from local_index import index_events
+
+
+def read_queries(source: IO[str]) -> List[str]:
+    """One query per line; blank lines and lines starting with # are ignored, duplicates dropped."""
+    queries: List[str] = []
+    seen: Set[str] = set()
+    for line in source:
+        query = line.strip()
+        if query and not query.startswith("#") and query not in seen:
+            seen.add(query)
+            queries.append(query)
+    return queries
+
+
+def completed_queries(output_path: str) -> Set[str]:
+    """
+    Queries that already finished in an existing JSONL output (a "done" line without
+    an error). Rows of queries that were interrupted or failed are dropped from the
+    file so that re-running them does not duplicate rows.
+    """
+    if not os.path.exists(output_path):
+        return set()
+    with open(output_path, encoding="utf-8") as f:
+        lines = [line for line in f if line.strip()]
+    records = []
+    for line in lines:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            records.append(None)  # Torn last line of an interrupted run
+    done = {r["query"] for r in records if r and r.get("done") and not r.get("error")}
+    keep = [line for line, r in zip(lines, records) if r and r.get("query") in done]
+    if len(keep) != len(lines):
+        tmp_path = output_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(line if line.endswith("\n") else line + "\n" for line in keep)
+        os.replace(tmp_path, output_path)
+    return done
+
+
+class JsonlWriter:
+    """Appends one JSON object per line and flushes it, so output is usable while running."""
+
+    def __init__(self, stream: IO[str]):
+        self.stream = stream
+
+    def write(self, record: Dict[str, object]) -> None:
+        self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+
+async def _search_one(pool: BrowserPool, writer: JsonlWriter, query: str, row_limit: int, timeout_ms: int, fetch_abstract: bool, fetch_claims: bool, shared_abstracts: Dict[str, asyncio.Future], fields: Optional[Sequence[str]] = None) -> Dict[str, object]:
+    """Run one query on a leased context, writing each row once its abstract is in."""
+
+    async def events():
+        async with pool.lease() as context:
+            async for event in iter_search_jplatpat_async(
+                query,
+                row_limit=row_limit,
+                timeout_ms=timeout_ms,
+                fetch_abstract=fetch_abstract,
+                context=context,
+                shared_abstracts=shared_abstracts,
+                fetch_claims=fetch_claims,
+                fields=fields,
+            ):
+                yield event
+
+    pending: Dict[int, Dict[str, object]] = {}
+    summary: Dict[str, object] = {"query": query, "done": True, "message": "", "count": 0, "next_offset": None}
+    try:
+        async for event in index_events(events()):
+            if event["event"] == "meta":
+                summary["message"] = event["message"]
+            elif event["event"] == "row":
+                summary["count"] += 1
+                row = event["row"]
+                if row["abstract_status"] == ABSTRACT_PENDING:
+                    pending[event["index"]] = row
+                else:
+                    writer.write({"query": query, **project_row(row, fields)})
+            elif event["event"] == "abstract":
+                row = pending.pop(event["index"])
+                row.update({k: v for k, v in event.items() if k not in ("event", "index", "document_number")})
+                writer.write({"query": query, **project_row(row, fields)})
+            elif event["event"] == "done":
+                summary["next_offset"] = event["next_offset"]
+    except Exception as exc:
+        summary["error"] = f"Search failed: {str(exc)}"
+    writer.write(summary)
+    return summary
+
+
+async def run_bulk(queries: Iterable[str], output: IO[str], concurrency: int = 2, headless: bool = True, row_limit: int = 10, timeout_ms: int = 20000, fetch_abstract: bool = True, fetch_claims: bool = False, progress: Optional[IO[str]] = sys.stderr, fields: Optional[Sequence[str]] = None) -> int:
+    """
+    Run many queries concurrently on the async engine, streaming rows to `output` as
+    JSONL. Every query ends with a {"query", "done": true, "count", ...} line (with
+    "error" when it failed). Rows are limited to `fields` when given. Returns the number of failed queries.
+    """
+    queries = list(queries)
+    writer = JsonlWriter(output)
+    pool = BrowserPool(browsers=1, contexts_per_browser=concurrency, headless=headless)
+    await pool.start()
+    # Documents that show up under several queries are fetched once
+    shared_abstracts: Dict[str, asyncio.Future] = {}
+    failed = 0
+    try:
+        tasks = [
+            asyncio.ensure_future(_search_one(pool, writer, query, row_limit, timeout_ms, fetch_abstract, fetch_claims, shared_abstracts, fields))
+            for query in queries
+        ]
+        for finished, task in enumerate(asyncio.as_completed(tasks), start=1):
+            summary = await task
+            if summary.get("error"):
+                failed += 1
+            if progress is not None:
+                status = summary.get("error") or f"{summary['count']} rows"
+                print(f"[{finished}/{len(queries)}] {summary['query']}: {status}", file=progress)
+    finally:
+        await pool.close()
+    return failed
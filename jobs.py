@@ -0,0 +1,309 @@
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from jplatpat_scraper_async import ABSTRACT_PENDING
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+# Identifies the process running a job, so that API workers sharing the store only
+# requeue jobs whose process is gone. The token tells a restarted process that got
+# the same pid (e.g. pid 1 in a container) from its predecessor.
+_OWNER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _owner_alive(owner: Optional[str]) -> bool:
+    host, pid, token = ((owner or "").rsplit(":", 2) + ["", "", ""])[:3]
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    if int(pid) == os.getpid():
+        return owner == _OWNER
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobStore:
+    """
+    SQLite-backed store for search jobs and their (partial) result rows.
+    Rows are written as they arrive, so progress is visible while a job runs
+    and finished results survive a process restart.
+    """
+
+    def __init__(self, db_path: str = "jplatpat_jobs.sqlite3"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=5.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, status TEXT NOT NULL, request TEXT NOT NULL,"
+            " message TEXT NOT NULL DEFAULT '', error TEXT, next_offset INTEGER,"
+            " created_at REAL NOT NULL, started_at REAL, finished_at REAL, owner TEXT);"
+            "CREATE TABLE IF NOT EXISTS job_rows ("
+            " job_id TEXT NOT NULL, idx INTEGER NOT NULL, row TEXT NOT NULL,"
+            " PRIMARY KEY (job_id, idx));"
+        )
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(jobs)").fetchall()]
+        if "owner" not in columns:
+            self._db.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+        self._db.commit()
+
+    @classmethod
+    def from_env(cls) -> "JobStore":
+        return cls(db_path=os.environ.get("JOB_STORE_PATH", "jplatpat_jobs.sqlite3"))
+
+    def _execute(self, sql: str, params: tuple = ()) -> None:
+        # The connection context commits, or rolls back if a statement fails (e.g. locked)
+        with self._lock, self._db:
+            self._db.execute(sql, params)
+
+    def create(self, request: Dict[str, object]) -> str:
+        job_id = uuid.uuid4().hex
+        self._execute(
+            "INSERT INTO jobs (id, status, request, created_at) VALUES (?, ?, ?, ?)",
+            (job_id, JOB_QUEUED, json.dumps(request, ensure_ascii=False), time.time()),
+        )
+        return job_id
+
+    def requeue_interrupted(self) -> List[str]:
+        """Put jobs left running by a process that is gone back in the queue; return all queued ids."""
+        with self._lock:
+            running = self._db.execute("SELECT id, owner FROM jobs WHERE status = ?", (JOB_RUNNING,)).fetchall()
+            for job_id, owner in running:
+                if not _owner_alive(owner):
+                    self._db.execute("UPDATE jobs SET status = ?, started_at = NULL, owner = NULL WHERE id = ? AND status = ?", (JOB_QUEUED, job_id, JOB_RUNNING))
+            self._db.commit()
+            rows = self._db.execute("SELECT id FROM jobs WHERE status = ? ORDER BY created_at", (JOB_QUEUED,)).fetchall()
+        return [row[0] for row in rows]
+
+    def prune(self, older_than_seconds: float) -> None:
+        """Delete finished jobs (and their rows) older than the retention period."""
+        cutoff = time.time() - older_than_seconds
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM job_rows WHERE job_id IN (SELECT id FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?)",
+                (cutoff,),
+            )
+            self._db.execute("DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (cutoff,))
+            self._db.commit()
+
+    def claim(self, job_id: str) -> bool:
+        """Mark a queued job as running by this process; False if another worker got it first."""
+        with self._lock, self._db:
+            claimed = self._db.execute(
+                "UPDATE jobs SET status = ?, started_at = ?, error = NULL, owner = ? WHERE id = ? AND status = ?",
+                (JOB_RUNNING, time.time(), _OWNER, job_id, JOB_QUEUED),
+            ).rowcount
+            if claimed:
+                # A restarted job starts from scratch
+                self._db.execute("DELETE FROM job_rows WHERE job_id = ?", (job_id,))
+        return claimed > 0
+
+    def release(self, job_id: str) -> None:
+        """Put a job this process claimed back in the queue."""
+        self._execute(
+            "UPDATE jobs SET status = ?, started_at = NULL, owner = NULL WHERE id = ? AND status = ? AND owner = ?",
+            (JOB_QUEUED, job_id, JOB_RUNNING, _OWNER),
+        )
+
+    def write_progress(self, job_id: str, message: Optional[str], rows: Dict[int, Dict[str, object]], updates: Dict[int, Dict[str, object]]) -> None:
+        """
+        Store a batch of progress in one transaction: the result message (unless None),
+        new `rows` by index, and field `updates` to rows stored earlier.
+        """
+        with self._lock, self._db:
+            if message is not None:
+                self._db.execute("UPDATE jobs SET message = ? WHERE id = ?", (message, job_id))
+            self._db.executemany(
+                "INSERT OR REPLACE INTO job_rows (job_id, idx, row) VALUES (?, ?, ?)",
+                [(job_id, idx, json.dumps(row, ensure_ascii=False)) for idx, row in rows.items()],
+            )
+            for idx, fields in updates.items():
+                found = self._db.execute("SELECT row FROM job_rows WHERE job_id = ? AND idx = ?", (job_id, idx)).fetchone()
+                if found is None:
+                    continue
+                row = json.loads(found[0])
+                row.update(fields)
+                self._db.execute(
+                    "UPDATE job_rows SET row = ? WHERE job_id = ? AND idx = ?",
+                    (json.dumps(row, ensure_ascii=False), job_id, idx),
+                )
+
+    def finish(self, job_id: str, next_offset: Optional[int] = None, error: Optional[str] = None) -> None:
+        self._execute(
+            "UPDATE jobs SET status = ?, next_offset = ?, error = ?, finished_at = ? WHERE id = ?",
+            (JOB_FAILED if error else JOB_SUCCEEDED, next_offset, error, time.time(), job_id),
+        )
+
+    def get(self, job_id: str, include_rows: bool = True) -> Optional[Dict[str, object]]:
+        with self._lock:
+            job = self._db.execute(
+                "SELECT id, status, request, message, error, next_offset, created_at, started_at, finished_at FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+            if job is None:
+                return None
+            rows = [json.loads(r[0]) for r in self._db.execute(
+                "SELECT row FROM job_rows WHERE job_id = ? ORDER BY idx", (job_id,)
+            ).fetchall()]
+        pending = sum(1 for row in rows if row.get("abstract_status") == ABSTRACT_PENDING)
+        result = {
+            "job_id": job[0],
+            "status": job[1],
+            "request": json.loads(job[2]),
+            "message": job[3],
+            "error": job[4],
+            "next_offset": job[5],
+            "created_at": job[6],
+            "started_at": job[7],
+            "finished_at": job[8],
+            "progress": {"rows": len(rows), "abstracts_pending": pending},
+        }
+        if include_rows:
+            result["rows"] = rows
+        return result
+
+    def list_jobs(self, limit: int = 50) -> List[Dict[str, object]]:
+        with self._lock:
+            jobs = self._db.execute(
+                "SELECT id, status, request, created_at, finished_at FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [
+            {"job_id": j[0], "status": j[1], "query": json.loads(j[2]).get("query"), "created_at": j[3], "finished_at": j[4]}
+            for j in jobs
+        ]
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class JobRunner:
+    """
+    Background worker pool executing queued jobs. `run_events` turns a stored
+    request dict into the event stream of iter_search_jplatpat_async. Progress is
+    buffered and written at most every `flush_interval` seconds, in a worker thread,
+    so a large job does not block the event loop with a commit per event.
+    A job that fails outside the search (e.g. the store is locked) is marked failed,
+    or retried after `retry_delay` seconds if even that cannot be stored.
+    """
+
+    def __init__(self, store: JobStore, run_events: Callable[[Dict[str, object]], AsyncIterator[Dict[str, object]]], workers: int = 1, flush_interval: float = 1.0, retry_delay: float = 5.0):
+        self.store = store
+        self.run_events = run_events
+        self.workers = max(1, workers)
+        self.flush_interval = flush_interval
+        self.retry_delay = retry_delay
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        for job_id in self.store.requeue_interrupted():
+            self._queue.put_nowait(job_id)
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, request: Dict[str, object]) -> str:
+        job_id = self.store.create(request)
+        self._queue.put_nowait(job_id)
+        return job_id
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                print(f"job {job_id} failed: {e}", file=sys.stderr, flush=True)
+                await self._recover(job_id, f"Job failed: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def _recover(self, job_id: str, error: str) -> None:
+        """Record a job that crashed outside the search as failed; if the store refuses, queue it again later."""
+        try:
+            await asyncio.to_thread(self.store.finish, job_id, None, error)
+            return
+        except Exception:
+            pass
+        await asyncio.sleep(self.retry_delay)
+        try:
+            await asyncio.to_thread(self.store.release, job_id)
+        except Exception:
+            pass  # still queued, or requeued by the next process
+        self._queue.put_nowait(job_id)
+
+    async def _run(self, job_id: str) -> None:
+        job = await asyncio.to_thread(self.store.get, job_id, False)
+        if job is None or not await asyncio.to_thread(self.store.claim, job_id):
+            return
+        next_offset = None
+        message: Optional[str] = None
+        rows: Dict[int, Dict[str, object]] = {}
+        updates: Dict[int, Dict[str, object]] = {}
+        flushed_at = time.monotonic()
+
+        async def flush() -> None:
+            nonlocal message, rows, updates, flushed_at
+            if message is not None or rows or updates:
+                batch = (message, rows, updates)
+                message, rows, updates = None, {}, {}
+                await asyncio.to_thread(self.store.write_progress, job_id, *batch)
+            flushed_at = time.monotonic()
+
+        try:
+            async for event in self.run_events(job["request"]):
+                if event["event"] == "meta":
+                    message = event["message"]
+                elif event["event"] == "row":
+                    rows[event["index"]] = dict(event["row"])
+                elif event["event"] == "abstract":
+                    fields = {key: value for key, value in event.items() if key not in ("event", "index", "document_number")}
+                    if event["index"] in rows:
+                        rows[event["index"]].update(fields)
+                    else:
+                        updates.setdefault(event["index"], {}).update(fields)
+                elif event["event"] == "done":
+                    next_offset = event["next_offset"]
+                if time.monotonic() - flushed_at >= self.flush_interval:
+                    await flush()
+            await flush()
+        except asyncio.CancelledError:
+            # Shutting down: leave the job as running so the next process requeues it
+            raise
+        except Exception as e:
+            await flush()
+            await asyncio.to_thread(self.store.finish, job_id, None, f"Search failed: {str(e)}")
+            return
+        await asyncio.to_thread(self.store.finish, job_id, next_offset)
@@ -0,0 +1,281 @@
+import os
+import re
+import time
+import unicodedata
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+# Simple search screen. Overridable so the scrapers can target a local stand-in (see benchmarks/)
+JPLATPAT_URL = os.environ.get("JPLATPAT_URL", "https://www.j-platpat.inpit.go.jp/s0100")
+JPLATPAT_ORIGIN = "{0.scheme}://{0.netloc}".format(urlsplit(JPLATPAT_URL))
+
+# 固定アドレス (fixed document URL) pattern: /c1800/PU/<document id>/<kind code>/ja
+DETAIL_URL_TEMPLATE = "{origin}/c1800/PU/{doc_id}/{kind}/ja"
+
+# Document number prefix as shown in the 文献番号 column -> kind code of the fixed address.
+# Only formats whose fixed address is known are listed; anything else returns "".
+# Not derivable here: 実登/実開/実公 (utility models), 再表, 特公 and era-dated numbers
+# (特開平…). For those the scrapers read the address off the document's popup once
+# (FIND_FIXED_URL_JS) and remember it in the abstract cache (FIXED_URL_CACHE_FIELD).
+_DOC_KINDS = [
+    (re.compile(r"^特開(\d{4})-(\d{6})$"), "JP-{0}-{1}", "11"),
+    (re.compile(r"^特表(\d{4})-(\d{6})$"), "JP-{0}-{1}", "11"),
+    (re.compile(r"^特許(\d{7})$"), "JP-{0}", "15"),
+]
+
+
+def normalize_document_number(document_number: str) -> str:
+    """NFKC-normalize (full-width digits/hyphens) and drop all whitespace."""
+    return "".join(unicodedata.normalize("NFKC", document_number or "").split())
+
+
+def document_url(document_number: str, origin: str = None) -> str:
+    """
+    Derive the fixed detail page URL from a document number such as 特開2023-123456.
+    Returns "" when the number format is not recognized.
+    """
+    origin = origin or JPLATPAT_ORIGIN
+    normalized = normalize_document_number(document_number)
+    for pattern, doc_id, kind in _DOC_KINDS:
+        match = pattern.match(normalized)
+        if match:
+            return DETAIL_URL_TEMPLATE.format(origin=origin, doc_id=doc_id.format(*match.groups()), kind=kind)
+    return ""
+
+
+# 簡易書誌 result table rows
+RESULT_ROWS_SELECTOR = "table#patentUtltyIntnlSimpleBibLst tbody tr"
+
+# Parses the whole result table inside the page so that all rows cross the
+# browser boundary in a single round trip. Text is normalized the same way as
+# _clean_text (trimmed, whitespace runs collapsed to one space).
+EXTRACT_ROWS_JS = """
+([selector, limit, columns]) => {
+    const clean = (el) => el ? (el.innerText || "").split(/\\s+/).filter(Boolean).join(" ") : "";
+    const texts = (els) => Array.from(els).map(clean).filter(Boolean);
+    const FIXED_URL = /(?:https?:\\/\\/[^\\s"'<>]+)?\\/c1800\\/PU\\/[^\\s"'<>]+/;
+    // Cells not in `columns` are not read (innerText forces layout); null reads all
+    const want = (name) => columns === null || columns.includes(name);
+    return Array.from(document.querySelectorAll(selector)).slice(0, limit).map((row) => {
+        const cells = row.querySelectorAll("td");
+        const cell = (i) => (cells.length > i ? cells[i] : null);
+        const docLink = cell(0) ? cell(0).querySelector("a") : null;
+        // Fixed address if the markup carries one (href, data-* of the row's links)
+        let fixedUrl = "";
+        if (want("document_url")) {
+            for (const el of row.querySelectorAll("a, [data-url]")) {
+                for (const attr of el.attributes) {
+                    const match = FIXED_URL.exec(attr.value);
+                    if (match && !fixedUrl) {
+                        fixedUrl = new URL(match[0], document.baseURI).href;
+                    }
+                }
+            }
+        }
+        let status = "";
+        if (want("status")) {
+            status = cell(6) ? texts(cell(6).querySelectorAll("label")).join(" / ") : "";
+            if (!status) {
+                status = clean(cell(6));
+            }
+        }
+        return {
+            no: clean(row.querySelector("th[scope='row'] p")),
+            document_number: docLink ? clean(docLink) : clean(cell(0)),
+            has_link: docLink !== null,
+            fixed_url: fixedUrl,
+            application_number: want("application_number") ? clean(cell(1)) : "",
+            application_date: want("application_date") ? clean(cell(2)) : "",
+            publication_date: want("publication_date") ? clean(cell(3)) : "",
+            invention_title: want("invention_title") ? clean(cell(4)) : "",
+            applicant: want("applicant") ? clean(cell(5)) : "",
+            status: status,
+            fi_codes: want("fi_codes") && cell(7) ? texts(cell(7).querySelectorAll("a")) : [],
+            actions: want("actions") && cell(8) ? texts(cell(8).querySelectorAll("a")) : [],
+        };
+    });
+}
+"""
+
+# Fields of a result row, in output order ("claims" only when requested)
+ROW_FIELDS = (
+    "no", "document_number", "document_url", "abstract", "abstract_status", "application_number",
+    "application_date", "publication_date", "invention_title", "applicant", "status", "fi_codes",
+    "actions", "claims",
+)
+
+# Fields EXTRACT_ROWS_JS can skip reading; "no" and "document_number" are always read
+_OPTIONAL_COLUMNS = (
+    "document_url", "application_number", "application_date", "publication_date",
+    "invention_title", "applicant", "status", "fi_codes", "actions",
+)
+
+
+def parse_fields(fields: Optional[Sequence[str]]) -> Optional[Tuple[str, ...]]:
+    """
+    Validate a field projection ("a,b" strings are split); None means all fields.
+    Raises ValueError for unknown names.
+    """
+    if fields is None:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    names = tuple(dict.fromkeys(name.strip() for name in fields if name.strip()))
+    unknown = [name for name in names if name not in ROW_FIELDS]
+    if unknown:
+        raise ValueError(f"unknown field(s): {', '.join(unknown)}; choose from {', '.join(ROW_FIELDS)}")
+    return names or None
+
+
+def table_columns(fields: Optional[Sequence[str]]) -> Optional[List[str]]:
+    """The EXTRACT_ROWS_JS `columns` argument for a projection (None reads every cell)."""
+    if fields is None:
+        return None
+    return [name for name in _OPTIONAL_COLUMNS if name in fields]
+
+
+def detail_work(fields: Optional[Sequence[str]], fetch_abstract: bool, fetch_claims: bool) -> Tuple[bool, bool]:
+    """
+    (fetch_abstract, fetch_claims) actually needed for a projection: detail pages are
+    only opened when "abstract" or "claims" is requested, and "claims" in `fields`
+    turns on claim extraction. `fetch_abstract=False` still disables detail pages.
+    """
+    if fields is None:
+        return fetch_abstract, fetch_claims
+    claims = fetch_abstract and "claims" in fields
+    return fetch_abstract and ("abstract" in fields or claims), claims
+
+
+def project_row(row: Dict[str, object], fields: Optional[Sequence[str]]) -> Dict[str, object]:
+    if fields is None:
+        return row
+    return {name: row[name] for name in fields if name in row}
+
+
+def to_columns(rows: Sequence[Dict[str, object]], fields: Optional[Sequence[str]] = None) -> Dict[str, list]:
+    """Columnar form of result rows: {field: [value per row]}."""
+    if fields is None:
+        fields = [name for name in ROW_FIELDS if rows and name in rows[0]]
+    return {name: [row.get(name) for row in rows] for name in fields}
+
+
+# Abstract cache "field" under which fixed addresses found on popups are kept
+FIXED_URL_CACHE_FIELD = "document_url"
+
+# The fixed address of the open document page, if it shows one: the page URL itself,
+# a link or data-* attribute, or a read-only input such as the URL dialog's
+FIND_FIXED_URL_JS = """
+() => {
+    const FIXED_URL = /(?:https?:\\/\\/[^\\s"'<>]+)?\\/c1800\\/PU\\/[^\\s"'<>]+/;
+    const candidates = [location.href];
+    for (const el of document.querySelectorAll("a, input, [data-url]")) {
+        for (const attr of el.attributes) {
+            candidates.push(attr.value);
+        }
+        if (el.value) {
+            candidates.push(el.value);
+        }
+    }
+    for (const value of candidates) {
+        const match = FIXED_URL.exec(value || "");
+        if (match) {
+            return new URL(match[0], document.baseURI).href;
+        }
+    }
+    return "";
+}
+"""
+
+
+def row_document_url(document_number: str, fixed_url: str = "") -> str:
+    """document_url of a result row: the fixed address found in the table DOM, else derived from the number."""
+    return fixed_url or document_url(document_number)
+
+
+# Result field -> 【】 headings that hold it on the detail page (first one found wins)
+SECTION_HEADINGS = {
+    "abstract": ("要約",),
+    "claims": ("特許請求の範囲", "請求の範囲", "実用新案登録請求の範囲"),
+}
+
+# Headings that start a top-level part of the document. A top-level section runs
+# until the next one of these, so 【課題】/【解決手段】 stay inside 【要約】 and
+# 【請求項１】... inside 【特許請求の範囲】.
+TOP_LEVEL_HEADINGS = r"^(書類名|要約|(特許|実用新案登録)?請求の範囲|(発明|考案)の詳細な説明|図面|図\s*[0-9０-９]|符号の説明)"
+
+# Single pass over the 【】 headings of the rendered detail page; only the requested
+# sections cross the browser boundary, not the whole body text. A nested section
+# (e.g. 【課題】) ends at the next heading of any kind. A trailing INID code such
+# as the "(57)" in "(57)【要約】" is dropped from the preceding section.
+EXTRACT_SECTIONS_JS = """
+([wanted, topLevel]) => {
+    const text = document.body ? document.body.innerText : "";
+    const isTop = new RegExp(topLevel);
+    const heading = /【([^【】\\n]{1,40})】/g;
+    const sections = {};
+    let open = [];
+    const close = (entry, end) => {
+        sections[entry.name] = text.slice(entry.start, end).replace(/\\(\\d+\\)\\s*$/, "").trim();
+    };
+    let match;
+    while ((match = heading.exec(text)) !== null) {
+        const name = match[1].trim();
+        const top = isTop.test(name);
+        open = open.filter((entry) => {
+            if (top || !entry.top) {
+                close(entry, match.index);
+                return false;
+            }
+            return true;
+        });
+        if (wanted.includes(name) && !(name in sections) && !open.some((entry) => entry.name === name)) {
+            open.push({name: name, start: heading.lastIndex, top: top});
+        }
+    }
+    open.forEach((entry) => close(entry, text.length));
+    return sections;
+}
+"""
+
+
+def section_headings(fields: Sequence[str]) -> List[str]:
+    """All 【】 headings to extract for the requested result fields."""
+    return [heading for field in fields for heading in SECTION_HEADINGS[field]]
+
+
+def sections_to_fields(sections: Dict[str, str], fields: Sequence[str]) -> Dict[str, str]:
+    """Map extracted {heading: text} to {field: text}; missing sections become ""."""
+    result = {}
+    for field in fields:
+        result[field] = next((sections[h] for h in SECTION_HEADINGS[field] if sections.get(h)), "")
+    return result
+
+
+def section_cache_key(document_number: str, field: str) -> str:
+    """Abstract cache key of a section; abstracts keep the bare document number."""
+    return document_number if field == "abstract" else f"{document_number}#{field}"
+
+
+class StageTimer:
+    """Accumulates wall time per named stage of one search (reported in milliseconds)."""
+
+    def __init__(self):
+        self._started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def as_dict(self) -> Dict[str, float]:
+        timings = {name: round(seconds * 1000, 1) for name, seconds in self.stages.items()}
+        timings["total"] = round((time.perf_counter() - self._started) * 1000, 1)
+        return timings
@@ -1,13 +1,19 @@
 import argparse
 import json
 import os
-import re
 import sys
+import time
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional, Sequence
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+from abstract_cache import get_abstract_cache
+from jplatpat_common import EXTRACT_ROWS_JS, EXTRACT_SECTIONS_JS, FIND_FIXED_URL_JS, FIXED_URL_CACHE_FIELD, JPLATPAT_URL, RESULT_ROWS_SELECTOR, TOP_LEVEL_HEADINGS, detail_work, parse_fields, project_row, row_document_url, section_cache_key, section_headings, sections_to_fields, table_columns
+from local_index import get_local_index
+from readiness import DETAIL_READY_JS, RESULT_MESSAGE_SELECTOR, RESULTS_READY_JS, SIGNAL_DETAIL, SIGNAL_RESULTS, ZERO_HIT_PATTERN, get_latency_tracker, ready_retries, retry_sync
+from resource_blocking import install_sync as install_resource_policy
 
-JPLATPAT_URL = "https://www.j-platpat.inpit.go.jp/s0100"
+# Per-detail-page readiness timeout for abstract fetching
+DETAIL_TIMEOUT_MS = int(os.environ.get("DETAIL_TIMEOUT_MS", "8000"))
 
 
 def _clean_text(element) -> str:
@@ -17,168 +23,153 @@ def _clean_text(element) -> str:
     return " ".join(text.split())
 
 
-def _extract_abstract(detail_page, timeout_ms: int = 5000) -> str:
+def _extract_sections(detail_page, fields: Sequence[str] = ("abstract",), timeout_ms: int = 8000, attempt: int = 0) -> Dict[str, str]:
     """
-    Extract abstract (要約) from patent detail page.
+    Extract the requested sections (abstract, claims) from a patent detail page
+    in one in-page pass, once the 【要約】 content (or a document without one) is
+    rendered. Returns {field: text}.
     """
-    detail_page.wait_for_timeout(3000)
-    body_text = detail_page.inner_text('body')
-    
-    # Extract 【要約】 section - usually after (57)
-    abstract = ""
-    if '(57)【要約】' in body_text:
-        start = body_text.find('(57)【要約】')
-        # Find the end of abstract section
-        end_markers = ['【特許請求の範囲】', '【図面', '【図１', '【図 1', '【発明の詳細な説明】', '請求の範囲', '詳細な説明']
-        end = len(body_text)
-        for marker in end_markers:
-            pos = body_text.find(marker, start + 10)
-            if pos != -1 and pos < end:
-                end = pos
-        
-        abstract = body_text[start:end].strip()
-        # Clean up the abstract text
-        abstract = abstract.replace('(57)【要約】', '').strip()
-    elif '【要約】' in body_text:
-        start = body_text.find('【要約】')
-        end_markers = ['【特許請求の範囲】', '【図面', '【図１', '【発明の詳細な説明】', '請求の範囲']
-        end = len(body_text)
-        for marker in end_markers:
-            pos = body_text.find(marker, start + 5)
-            if pos != -1 and pos < end:
-                end = pos
-        abstract = body_text[start:end].strip()
-        abstract = abstract.replace('【要約】', '').strip()
-    
-    return abstract
+    tracker = get_latency_tracker()
+    started = time.perf_counter()
+    detail_page.wait_for_function(DETAIL_READY_JS, timeout=tracker.timeout_ms(SIGNAL_DETAIL, timeout_ms, attempt))
+    tracker.record(SIGNAL_DETAIL, (time.perf_counter() - started) * 1000)
+    sections = detail_page.evaluate(EXTRACT_SECTIONS_JS, [section_headings(fields), TOP_LEVEL_HEADINGS])
+    return sections_to_fields(sections, fields)
 
 
-def _extract_rows(page, context, limit: int = 50, fetch_abstract: bool = True) -> List[Dict[str, str]]:
+def _extract_rows(page, context, limit: int = 50, fetch_abstract: bool = True, fetch_claims: bool = False, columns: Optional[List[str]] = None) -> List[Dict[str, str]]:
     """
     Extract rows from 簡易書誌 (Simple Bibliography) view table.
     Table ID: patentUtltyIntnlSimpleBibLst
     Columns: No., 文献番号, 出願番号, 出願日, 公知日, 発明の名称, 出願人/権利者, ステータス, FI, 各種機能
+    Only the cells in `columns` are read (None reads all).
     """
-    rows = page.query_selector_all("table#patentUtltyIntnlSimpleBibLst tbody tr")
+    # All cells (and the fixed document URL) in one round trip; element handles are
+    # only looked up for rows whose detail page is opened
+    raw_rows = page.evaluate(EXTRACT_ROWS_JS, [RESULT_ROWS_SELECTOR, limit, columns])
+    rows = page.query_selector_all(RESULT_ROWS_SELECTOR) if fetch_abstract else []
     results: List[Dict[str, str]] = []
+    cache = get_abstract_cache()
+    fields = ("abstract", "claims") if fetch_claims else ("abstract",)
     
-    for idx, row in enumerate(rows[:limit]):
-        cells = row.query_selector_all("td")
-        
-        # No.
-        number = _clean_text(row.query_selector("th[scope='row'] p"))
-        
-        # 文献番号 (Document Number) - usually has a link
-        doc_num_el = cells[0].query_selector("a") if len(cells) > 0 else None
-        doc_num = _clean_text(doc_num_el) if doc_num_el else _clean_text(cells[0]) if len(cells) > 0 else ""
-        
-        # 出願番号 (Application Number)
-        app_num = _clean_text(cells[1]) if len(cells) > 1 else ""
-        
-        # 出願日 (Application Date)
-        app_date = _clean_text(cells[2]) if len(cells) > 2 else ""
-        
-        # 公知日 (Publication Date)
-        pub_date = _clean_text(cells[3]) if len(cells) > 3 else ""
-        
-        # 発明の名称 (Invention Title)
-        invention_title = _clean_text(cells[4]) if len(cells) > 4 else ""
-        
-        # 出願人/権利者 (Applicant/Rights Holder)
-        applicant = _clean_text(cells[5]) if len(cells) > 5 else ""
+    for idx, raw in enumerate(raw_rows):
+        doc_num = raw["document_number"]
+        has_link = fetch_abstract and raw["has_link"] and idx < len(rows)
         
-        # ステータス (Status) - may have multiple labels
-        status_labels = cells[6].query_selector_all("label") if len(cells) > 6 else []
-        status = " / ".join([_clean_text(label) for label in status_labels if _clean_text(label)])
-        if not status and len(cells) > 6:
-            status = _clean_text(cells[6])
+        # Fixed address from the table DOM, else derived from the number format, else
+        # found on an earlier popup of the document
+        doc_url = row_document_url(doc_num, raw["fixed_url"]) or cache.get(section_cache_key(doc_num, FIXED_URL_CACHE_FIELD)) or ""
         
-        # FI (Classification) - may have multiple links
-        fi_links = cells[7].query_selector_all("a") if len(cells) > 7 else []
-        fi_codes = [_clean_text(link) for link in fi_links if _clean_text(link)]
-        
-        # 各種機能 (Various Functions) - action buttons
-        action_links = cells[8].query_selector_all("a") if len(cells) > 8 else []
-        actions = [_clean_text(link) for link in action_links if _clean_text(link)]
-        
-        # Get document URL by clicking URL button
-        doc_url = ""
-        url_btn = row.query_selector(f"a[id='patentUtltyIntnlSimpleBibLst_tableView_url{idx}']")
-        if url_btn:
-            url_btn.click()
-            page.wait_for_timeout(800)
-            # Find the dialog and extract URL
-            dialog = page.query_selector(".mat-dialog-container, [role='dialog']")
-            if dialog:
-                dialog_text = dialog.inner_text()
-                # Extract URL from dialog text (format: https://www.j-platpat.inpit.go.jp/...)
-                url_match = re.search(r'(https://www\.j-platpat\.inpit\.go\.jp/[^\s]+)', dialog_text)
-                if url_match:
-                    doc_url = url_match.group(1)
-                # Close the dialog by pressing Escape or clicking close button
-                page.keyboard.press("Escape")
-                page.wait_for_timeout(300)
-        
-        # Get abstract by clicking document link and opening detail page
-        abstract = ""
-        if fetch_abstract and doc_num_el:
-            try:
-                with context.expect_page() as new_page_info:
-                    doc_num_el.click()
+        # Get abstract (and claims) by clicking document link and opening detail page
+        sections = {field: "" for field in fields}
+        cached = {field: cache.get(section_cache_key(doc_num, field)) for field in fields} if has_link else None
+        if cached is not None and all(value is not None for value in cached.values()):
+            sections = cached
+        elif has_link:
+            def open_detail(attempt: int) -> Dict[str, str]:
+                with context.expect_page(timeout=DETAIL_TIMEOUT_MS) as new_page_info:
+                    rows[idx].query_selector("td a").click()
                 detail_page = new_page_info.value
-                detail_page.wait_for_load_state('domcontentloaded')
-                abstract = _extract_abstract(detail_page)
-                detail_page.close()
+                try:
+                    detail_page.wait_for_load_state('domcontentloaded')
+                    sections = _extract_sections(detail_page, fields, timeout_ms=DETAIL_TIMEOUT_MS, attempt=attempt)
+                    if not doc_url:
+                        fixed_url = detail_page.evaluate(FIND_FIXED_URL_JS)
+                        if fixed_url:
+                            sections[FIXED_URL_CACHE_FIELD] = fixed_url
+                    return sections
+                finally:
+                    detail_page.close()
+
+            try:
+                sections = retry_sync(open_detail)
+                fixed_url = sections.pop(FIXED_URL_CACHE_FIELD, "")
+                if fixed_url:
+                    doc_url = fixed_url
+                    cache.set(section_cache_key(doc_num, FIXED_URL_CACHE_FIELD), fixed_url)
+                for field, value in sections.items():
+                    cache.set(section_cache_key(doc_num, field), value)
             except Exception as e:
-                abstract = f"Error: {str(e)}"
+                sections["abstract"] = f"Error: {str(e)}"
         
-        results.append({
-            "no": number,
+        result = {
+            "no": raw["no"],
             "document_number": doc_num,
             "document_url": doc_url,
-            "abstract": abstract,
-            "application_number": app_num,
-            "application_date": app_date,
-            "publication_date": pub_date,
-            "invention_title": invention_title,
-            "applicant": applicant,
-            "status": status,
-            "fi_codes": fi_codes,
-            "actions": actions,
-        })
+            "abstract": sections["abstract"],
+            "application_number": raw["application_number"],
+            "application_date": raw["application_date"],
+            "publication_date": raw["publication_date"],
+            "invention_title": raw["invention_title"],
+            "applicant": raw["applicant"],
+            "status": raw["status"],
+            "fi_codes": raw["fi_codes"],
+            "actions": raw["actions"],
+        }
+        if fetch_claims:
+            result["claims"] = sections["claims"]
+        results.append(result)
     
     return results
 
 
-def search_jplatpat(query: str, headless: bool = True, row_limit: int = 50, timeout_ms: int = 20000, fetch_abstract: bool = True) -> Dict[str, object]:
+def _open_results(page, query: str, timeout_ms: int) -> None:
+    """
+    Submit `query` and wait until the result table or a zero-hit message is shown,
+    reloading and retrying (READY_RETRIES) when neither appears in time.
+    """
+    tracker = get_latency_tracker()
+    retries = ready_retries()
+
+    def attempt(n: int) -> None:
+        page.goto(JPLATPAT_URL, wait_until="domcontentloaded", timeout=timeout_ms)
+        page.wait_for_selector("input#s01_srchCondtn_txtSimpleSearch", timeout=timeout_ms)
+        page.fill("input#s01_srchCondtn_txtSimpleSearch", query)
+
+        # Click the search button instead of pressing Enter
+        page.click("a#s01_srchBtn_btnSearch")
+
+        started = time.perf_counter()
+        try:
+            page.wait_for_function(
+                RESULTS_READY_JS,
+                arg=[RESULT_ROWS_SELECTOR, RESULT_MESSAGE_SELECTOR, ZERO_HIT_PATTERN],
+                timeout=tracker.timeout_ms(SIGNAL_RESULTS, timeout_ms, n),
+            )
+        except PlaywrightTimeoutError:
+            # Out of retries but a result message is shown (e.g. an unknown zero-hit wording)
+            if n < retries or not _clean_text(page.query_selector(RESULT_MESSAGE_SELECTOR)):
+                raise
+            return
+        tracker.record(SIGNAL_RESULTS, (time.perf_counter() - started) * 1000)
+
+    retry_sync(attempt, retries)
+
+
+def search_jplatpat(query: str, headless: bool = True, row_limit: int = 50, timeout_ms: int = 20000, fetch_abstract: bool = True, fetch_claims: bool = False, fields: Optional[Sequence[str]] = None) -> Dict[str, object]:
+    """With `fields`, only those fields are extracted and returned per row."""
+    fetch_abstract, fetch_claims = detail_work(fields, fetch_abstract, fetch_claims)
     launch_args = ["--no-sandbox", "--disable-dev-shm-usage"]
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=headless, args=launch_args)
         context = browser.new_context(locale="ja-JP", user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+        install_resource_policy(context)
         page = context.new_page()
 
         try:
-            page.goto(JPLATPAT_URL, wait_until="domcontentloaded", timeout=timeout_ms)
-            page.wait_for_selector("input#s01_srchCondtn_txtSimpleSearch", timeout=timeout_ms)
-            page.fill("input#s01_srchCondtn_txtSimpleSearch", query)
-
-            # Click the search button instead of pressing Enter
-            page.click("a#s01_srchBtn_btnSearch")
-
-            # Wait for results to render - use fixed timeout as the SPA can be unreliable with selectors
-            page.wait_for_timeout(5000)
+            _open_results(page, query, timeout_ms)
 
             message = ""
-            msg_el = page.query_selector("#patentUtltyIntnlDocLst_searchResultMsg")
+            msg_el = page.query_selector(RESULT_MESSAGE_SELECTOR)
             if msg_el:
                 message = _clean_text(msg_el)
 
-            rows = _extract_rows(page, context, limit=row_limit, fetch_abstract=fetch_abstract)
+            rows = _extract_rows(page, context, limit=row_limit, fetch_abstract=fetch_abstract, fetch_claims=fetch_claims, columns=table_columns(fields))
             return {
                 "query": query,
                 "message": message,
                 "count": len(rows),
-                "rows": rows,
+                "rows": [project_row(row, fields) for row in rows],
             }
         except PlaywrightTimeoutError as exc:
             raise RuntimeError(f"Timed out waiting for page elements: {exc}") from exc
@@ -189,16 +180,32 @@ def search_jplatpat(query: str, headless: bool = True, row_limit: int = 50, time
 
 def main(argv: List[str]) -> int:
     parser = argparse.ArgumentParser(description="Search j-platpat and return result table as JSON")
-    parser.add_argument("query", help="Search string to input into the simple search box")
+    parser.add_argument("query", nargs="?", help="Search string to input into the simple search box")
     parser.add_argument("--headful", action="store_true", help="Run browser in headful mode for debugging")
     parser.add_argument("--limit", type=int, default=10, help="Maximum number of rows to return")
     parser.add_argument("--timeout", type=int, default=20000, help="Timeout in milliseconds for page waits")
     parser.add_argument("--output", "-o", type=str, help="Output JSON file path. If not specified, auto-generates filename with timestamp.")
     parser.add_argument("--no-abstract", action="store_false", dest="abstract", help="Disable fetching abstract (要約) for each patent. By default, abstract is fetched.")
+    parser.add_argument("--claims", action="store_true", help="Also extract the claims (特許請求の範囲) from each detail page")
+    parser.add_argument("--fields", type=str, help="Comma-separated fields to extract and output, e.g. document_number,invention_title (abstracts are only fetched when abstract or claims is listed)")
+    parser.add_argument("--queries-file", type=str, help="Bulk mode: read one query per line from this file ('-' for stdin) and append rows as JSONL to --output. Queries already completed in the output file are skipped.")
+    parser.add_argument("--concurrency", type=int, default=2, help="Bulk mode: number of queries run at once on the async engine")
     args = parser.parse_args(argv)
+    try:
+        args.fields = parse_fields(args.fields)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    if args.queries_file:
+        return _bulk_main(args)
+    if not args.query:
+        parser.error("a query or --queries-file is required")
 
     try:
-        data = search_jplatpat(args.query, headless=not args.headful, row_limit=args.limit, timeout_ms=args.timeout, fetch_abstract=args.abstract)
+        data = search_jplatpat(args.query, headless=not args.headful, row_limit=args.limit, timeout_ms=args.timeout, fetch_abstract=args.abstract, fetch_claims=args.claims, fields=args.fields)
+        index = get_local_index()
+        if index is not None:
+            index.add_rows(data["rows"])
         
         # Determine output filename
         if args.output:
@@ -219,5 +226,48 @@ def main(argv: List[str]) -> int:
         return 1
 
 
+def _bulk_main(args: argparse.Namespace) -> int:
+    import asyncio
+    from bulk_search import completed_queries, read_queries, run_bulk
+
+    if args.queries_file == "-":
+        queries = read_queries(sys.stdin)
+    else:
+        with open(args.queries_file, encoding="utf-8") as f:
+            queries = read_queries(f)
+
+    if args.output == "-":
+        output_path, done = None, set()
+    else:
+        output_path = args.output or f"jplatpat_bulk_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+        done = completed_queries(output_path)
+    todo = [query for query in queries if query not in done]
+    if done:
+        print(f"跳过已完成的查询: {len(queries) - len(todo)}", file=sys.stderr)
+
+    output = sys.stdout if output_path is None else open(output_path, "a", encoding="utf-8")
+    try:
+        failed = asyncio.run(run_bulk(
+            todo,
+            output,
+            concurrency=max(1, args.concurrency),
+            headless=not args.headful,
+            row_limit=args.limit,
+            timeout_ms=args.timeout,
+            fetch_abstract=args.abstract,
+            fetch_claims=args.claims,
+            fields=args.fields,
+        ))
+    except Exception as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    if output_path is not None:
+        print(f"结果已保存到: {output_path}", file=sys.stderr)
+    return 1 if failed else 0
+
+
 if __name__ == "__main__":
     sys.exit(main(sys.argv[1:]))
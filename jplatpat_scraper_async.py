@@ -1,12 +1,31 @@
+import os
 import re
+import time
 import asyncio
-from typing import List, Dict, Optional
-from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+import functools
+import weakref
+from typing import AsyncIterator, Awaitable, Callable, List, Dict, Optional, Sequence, Tuple
+from playwright.async_api import async_playwright, Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+from abstract_cache import get_abstract_cache
+from jplatpat_common import EXTRACT_ROWS_JS, EXTRACT_SECTIONS_JS, FIND_FIXED_URL_JS, FIXED_URL_CACHE_FIELD, JPLATPAT_URL, RESULT_ROWS_SELECTOR, TOP_LEVEL_HEADINGS, StageTimer, detail_work, project_row, row_document_url, section_cache_key, section_headings, sections_to_fields, table_columns
+from readiness import DETAIL_READY_JS, MARK_STALE_RESULTS_JS, RESULT_MESSAGE_SELECTOR, RESULTS_READY_JS, SIGNAL_DETAIL, SIGNAL_RESULTS, ZERO_HIT_PATTERN, get_latency_tracker, ready_retries, retry_async
+from resource_blocking import install_async as install_resource_policy
 
-JPLATPAT_URL = "https://www.j-platpat.inpit.go.jp/s0100"
+# Per-detail-page readiness timeout for abstract fetching
+DETAIL_TIMEOUT_MS = int(os.environ.get("DETAIL_TIMEOUT_MS", "8000"))
 
-# Cache for abstracts to avoid re-fetching
-_abstract_cache: Dict[str, str] = {}
+LAUNCH_ARGS = ["--no-sandbox", "--disable-dev-shm-usage"]
+CONTEXT_OPTIONS = {
+    "locale": "ja-JP",
+    "user_agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+}
+
+
+async def new_context(browser):
+    """Create a scraping context with the standard options and resource blocking installed."""
+    context = await browser.new_context(**CONTEXT_OPTIONS)
+    await install_resource_policy(context)
+    return context
 
 
 async def _clean_text(element) -> str:
@@ -16,245 +35,660 @@ async def _clean_text(element) -> str:
     return " ".join(text.split())
 
 
-async def _extract_abstract(detail_page, timeout_ms: int = 1000) -> str:
+# Abstract fetch outcomes reported per row in "abstract_status"
+ABSTRACT_OK = "ok"            # abstract found
+ABSTRACT_NONE = "none"        # detail page loaded but has no 【要約】
+ABSTRACT_TIMEOUT = "timeout"  # detail page did not become ready in time
+ABSTRACT_ERROR = "error"      # navigation or extraction failed
+ABSTRACT_SKIPPED = "skipped"  # not requested or no document link
+ABSTRACT_PENDING = "pending"  # fetch still running (streaming only)
+
+async def _extract_sections(detail_page, fields: Sequence[str] = ("abstract",), timeout_ms: int = 8000, attempt: int = 0) -> Tuple[Dict[str, str], str]:
     """
-    Extract abstract (要約) from patent detail page.
-    Ultra-fast extraction - fail at 500ms.
+    Extract the requested sections (abstract, claims) from a patent detail page in one
+    in-page pass. Waits for the 【要約】 content itself rather than a fixed delay, with
+    a timeout adapted to observed detail latency (the full `timeout_ms` on retries).
+    Returns ({field: text}, abstract_status).
     """
+    tracker = get_latency_tracker()
+    started = time.perf_counter()
     try:
-        # Just try to read body immediately without waiting
-        body_text = await asyncio.wait_for(
-            detail_page.inner_text('body'),
-            timeout=0.5
+        await detail_page.wait_for_function(DETAIL_READY_JS, timeout=tracker.timeout_ms(SIGNAL_DETAIL, timeout_ms, attempt))
+    except PlaywrightTimeoutError:
+        return {field: "" for field in fields}, ABSTRACT_TIMEOUT
+    tracker.record(SIGNAL_DETAIL, (time.perf_counter() - started) * 1000)
+    sections = await detail_page.evaluate(EXTRACT_SECTIONS_JS, [section_headings(fields), TOP_LEVEL_HEADINGS])
+    values = sections_to_fields(sections, fields)
+    return values, ABSTRACT_OK if values.get("abstract") else ABSTRACT_NONE
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit for detail pages that adapts to how J-PlatPat responds (AIMD):
+    the limit grows by one after `limit` consecutive successes and halves on a timeout.
+    """
+
+    def __init__(self, initial: int = 4, minimum: int = 1, maximum: int = 8):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(max(initial, self.minimum), self.maximum)
+        self._active = 0
+        self._successes = 0
+        self._cond = asyncio.Condition()
+
+    @classmethod
+    def from_env(cls) -> "AdaptiveLimiter":
+        return cls(
+            initial=int(os.environ.get("DETAIL_CONCURRENCY", "4")),
+            maximum=int(os.environ.get("DETAIL_CONCURRENCY_MAX", "8")),
         )
-    except (asyncio.TimeoutError, Exception):
-        return ""
-    
-    # Extract 【要約】 section - usually after (57)
-    abstract = ""
-    if '(57)【要約】' in body_text:
-        start = body_text.find('(57)【要約】')
-        # Find the end of abstract section
-        end_markers = ['【特許請求の範囲】', '【図面', '【図１', '【図 1', '【発明の詳細な説明】', '請求の範囲', '詳細な説明']
-        end = len(body_text)
-        for marker in end_markers:
-            pos = body_text.find(marker, start + 10)
-            if pos != -1 and pos < end:
-                end = pos
-        
-        abstract = body_text[start:end].strip()
-        # Clean up the abstract text
-        abstract = abstract.replace('(57)【要約】', '').strip()
-    elif '【要約】' in body_text:
-        start = body_text.find('【要約】')
-        end_markers = ['【特許請求の範囲】', '【図面', '【図１', '【発明の詳細な説明】', '請求の範囲']
-        end = len(body_text)
-        for marker in end_markers:
-            pos = body_text.find(marker, start + 5)
-            if pos != -1 and pos < end:
-                end = pos
-        abstract = body_text[start:end].strip()
-        abstract = abstract.replace('【要約】', '').strip()
-    
-    return abstract
 
+    async def __aenter__(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._active < self.limit)
+            self._active += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        async with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def record(self, timed_out: bool) -> None:
+        if timed_out:
+            self.limit = max(self.minimum, self.limit // 2)
+            self._successes = 0
+        else:
+            self._successes += 1
+            if self._successes >= self.limit and self.limit < self.maximum:
+                self.limit += 1
+                self._successes = 0
+
+
+_detail_limiter: Optional[AdaptiveLimiter] = None
+_detail_limiter_loop = None
+
+
+def get_detail_limiter() -> AdaptiveLimiter:
+    """
+    Process-wide detail page limiter shared by all searches (of the running event
+    loop), so concurrent searches together back off when J-PlatPat slows down.
+    """
+    global _detail_limiter, _detail_limiter_loop
+    loop = asyncio.get_running_loop()
+    if _detail_limiter is None or _detail_limiter_loop is not loop:
+        _detail_limiter = AdaptiveLimiter.from_env()
+        _detail_limiter_loop = loop
+    return _detail_limiter
+
+
+class DetailPagePool:
+    """
+    Detail pages reused across rows of one search. Pages are opened lazily, so
+    at most as many exist as the limiter ever allowed to run at once.
+    """
+
+    def __init__(self, context):
+        self.context = context
+        self._idle: List = []
+
+    async def acquire(self):
+        if self._idle:
+            return self._idle.pop()
+        return await self.context.new_page()
+
+    async def release(self, page, healthy: bool = True) -> None:
+        """Keep a healthy page for the next row; close one that timed out or failed."""
+        if page.is_closed():
+            return
+        if healthy:
+            self._idle.append(page)
+            return
+        try:
+            await page.close()
+        except Exception:
+            pass
+
+    async def close(self) -> None:
+        for page in self._idle:
+            try:
+                await page.close()
+            except Exception:
+                pass
+        self._idle = []
+
+
+async def _open_detail_by_click(context, doc_num_el, fields: Sequence[str], timeout_ms: int, attempt: int = 0, clicked: Optional[asyncio.Event] = None) -> Tuple[Dict[str, str], str, str]:
+    """
+    Fallback for document numbers without a known fixed address: open the popup.
+    Sets `clicked` once the popup is open, as the result table is no longer needed.
+    Returns ({field: text}, abstract_status, fixed address shown on the popup or "").
+    """
+    async with context.expect_page(timeout=timeout_ms) as new_page_info:
+        await doc_num_el.click()
+    detail_page = await new_page_info.value
+    if clicked is not None:
+        clicked.set()
+    try:
+        values, status = await _extract_sections(detail_page, fields, timeout_ms=timeout_ms, attempt=attempt)
+        fixed_url = await detail_page.evaluate(FIND_FIXED_URL_JS) if status != ABSTRACT_TIMEOUT else ""
+        return values, status, fixed_url
+    finally:
+        await detail_page.close()
+
+
+async def _cache_lookup(keys: Sequence[str]) -> Dict[str, Optional[str]]:
+    """Abstract cache values for `keys`: memory answers on the loop, only what it lacks is read from SQLite in a worker thread."""
+    cache = get_abstract_cache()
+    found = cache.get_many(keys, disk=False)
+    missing = [key for key, value in found.items() if value is None]
+    if missing and cache.persistent:
+        found.update(await asyncio.to_thread(cache.get_many, missing))
+    return found
 
-async def _fetch_abstract_for_row(context, doc_num_el, doc_num: str, idx: int, page, semaphore: asyncio.Semaphore) -> Optional[str]:
+
+async def _learned_urls(document_numbers: Sequence[str]) -> Dict[str, str]:
+    """Fixed addresses found on earlier popups of documents whose number format has none."""
+    keys = {section_cache_key(document_number, FIXED_URL_CACHE_FIELD): document_number for document_number in document_numbers}
+    found = await _cache_lookup(list(keys))
+    return {keys[key]: value for key, value in found.items() if value}
+
+
+async def _fetch_abstract_for_row(context, doc_num_el, doc_num: str, url: str, pages: DetailPagePool, limiter: AdaptiveLimiter, timeout_ms: int, fields: Sequence[str] = ("abstract",), clicked: Optional[asyncio.Event] = None) -> Tuple[Dict[str, str], str]:
     """
-    Fetch abstract - ultra aggressive timeout.
-    Total time: max 1 second from click to extract.
+    Fetch the abstract (and other requested sections) by navigating a pooled page
+    to the document's fixed `url`; without one, the row's link popup is used (and
+    `clicked` set once it is open).
+    Timeouts and navigation errors are retried (READY_RETRIES) before giving up.
+    Returns ({field: text}, abstract_status); when the popup shows the document's
+    fixed address, it is included as "document_url" and remembered for next time.
     """
     if not doc_num_el:
-        return ""
+        return {field: "" for field in fields}, ABSTRACT_SKIPPED
     
-    # Check cache first
-    if doc_num in _abstract_cache:
-        return _abstract_cache[doc_num]
+    # Check cache first; a hit needs every requested section
+    cache = get_abstract_cache()
+    keys = {field: section_cache_key(doc_num, field) for field in fields}
+    cached = await _cache_lookup(list(keys.values()))
+    if all(value is not None for value in cached.values()):
+        values = {field: cached[key] for field, key in keys.items()}
+        return values, ABSTRACT_OK if values.get("abstract") else ABSTRACT_NONE
     
-    async with semaphore:  # Limit concurrent page opens (max 4 simultaneous)
+    retries = ready_retries()
+    timed_out = False
+    fixed_url = ""
+    async with limiter:
+        for attempt in range(retries + 1):
+            try:
+                if url:
+                    detail_page = await pages.acquire()
+                    healthy = False
+                    try:
+                        await detail_page.goto(url, wait_until="domcontentloaded", timeout=timeout_ms)
+                        values, status = await _extract_sections(detail_page, fields, timeout_ms=timeout_ms, attempt=attempt)
+                        healthy = status != ABSTRACT_TIMEOUT
+                    finally:
+                        await pages.release(detail_page, healthy)
+                else:
+                    values, status, fixed_url = await _open_detail_by_click(context, doc_num_el, fields, timeout_ms, attempt, clicked)
+            except PlaywrightTimeoutError:
+                values, status = {field: "" for field in fields}, ABSTRACT_TIMEOUT
+            except Exception:
+                values, status = {field: "" for field in fields}, ABSTRACT_ERROR
+            timed_out = timed_out or status == ABSTRACT_TIMEOUT
+            if status not in (ABSTRACT_TIMEOUT, ABSTRACT_ERROR) or attempt == retries:
+                break
+            get_latency_tracker().retries += 1
+    limiter.record(timed_out)
+    
+    # Cache loaded pages, including "" for missing sections; timeouts and errors are retried next time
+    if status in (ABSTRACT_OK, ABSTRACT_NONE):
+        for field, key in keys.items():
+            cache.set(key, values[field])
+    if fixed_url:
+        cache.set(section_cache_key(doc_num, FIXED_URL_CACHE_FIELD), fixed_url)
+        values = {**values, "document_url": fixed_url}
+    return values, status
+
+
+async def _shared_fetch(shared_abstracts: Dict[str, asyncio.Future], key: str, make_fetch: Callable[[], Awaitable[Tuple[Dict[str, str], str]]]) -> Tuple[Dict[str, str], str]:
+    """
+    Join an in-flight fetch of the same document (and sections), or start `make_fetch()`
+    as the shared one. The shared fetch runs on the pages of the search that started
+    it, so if it errors (e.g. that search failed and its context was reset) it is
+    dropped and fetched again on this search's pages.
+    """
+    task = shared_abstracts.get(key)
+    if task is not None:
         try:
-            async with context.expect_page() as new_page_info:
-                await doc_num_el.click()
-            
-            # Wait for page with 0.8s timeout
-            detail_page = await asyncio.wait_for(
-                new_page_info.value,
-                timeout=0.8
-            )
-            
-            # Don't wait for page load - extract immediately
-            abstract = await _extract_abstract(detail_page, timeout_ms=500)
-            await detail_page.close()
-            
-            # Cache the result
-            if abstract:
-                _abstract_cache[doc_num] = abstract
-            return abstract
+            # Shielded so one search giving up does not cancel the fetch for the others
+            values, status = await asyncio.shield(task)
+            if status != ABSTRACT_ERROR:
+                return values, status
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise
         except Exception:
-            return ""
+            pass
+        if shared_abstracts.get(key) is task:
+            del shared_abstracts[key]
+        # Another waiter may have restarted it already
+        task = shared_abstracts.get(key)
+    if task is None:
+        task = asyncio.ensure_future(make_fetch())
+        shared_abstracts[key] = task
+    return await asyncio.shield(task)
+
+
+async def _indexed_abstract(idx: int, fetch, fields: Sequence[str]) -> Tuple[int, Dict[str, str], str]:
+    try:
+        values, status = await fetch
+    except Exception:
+        values, status = {field: "" for field in fields}, ABSTRACT_ERROR
+    return idx, values, status
+
+
+# Control that loads the next block of results (paging or "load more").
+# Overridable because it depends on the current J-PlatPat markup.
+NEXT_PAGE_SELECTOR = os.environ.get(
+    "JPLATPAT_NEXT_PAGE_SELECTOR",
+    "#patentUtltyIntnlSimpleBibLst_btnNext, button:has-text('さらに表示'), a:has-text('次へ'), button:has-text('次へ')",
+)
+
+_TABLE_STATE_JS = """
+(selector) => {
+    const rows = document.querySelectorAll(selector);
+    const first = rows.length ? rows[0].querySelector("th[scope='row'] p") : null;
+    return [rows.length, first ? first.innerText.trim() : ""];
+}
+"""
+
+# True once the table differs from [count, firstNo]: rows appended (load more) or replaced (paging)
+_TABLE_CHANGED_JS = """
+([selector, count, firstNo]) => {
+    const rows = document.querySelectorAll(selector);
+    if (!rows.length) {
+        return false;
+    }
+    const first = rows[0].querySelector("th[scope='row'] p");
+    return rows.length !== count || (first ? first.innerText.trim() : "") !== firstNo;
+}
+"""
+
 
+def _row_key(raw: Dict[str, object]) -> str:
+    # No. is the hit number, unique across result pages
+    return raw["no"] or raw["document_number"]
 
-async def _extract_rows(page, context, limit: int = 50, fetch_abstract: bool = True) -> List[Dict[str, str]]:
+
+async def _advance_page(page, timeout_ms: int) -> bool:
+    """Load the next block of results. Returns False when there is none."""
+    next_control = page.locator(NEXT_PAGE_SELECTOR).first
+    try:
+        if not await next_control.count() or not await next_control.is_visible() or not await next_control.is_enabled():
+            return False
+        count, first_no = await page.evaluate(_TABLE_STATE_JS, RESULT_ROWS_SELECTOR)
+        await next_control.click(timeout=timeout_ms)
+        await page.wait_for_function(_TABLE_CHANGED_JS, arg=[RESULT_ROWS_SELECTOR, count, first_no], timeout=timeout_ms)
+        return True
+    except PlaywrightError:
+        # Timed out or the control went away: treat as the end of the results
+        return False
+
+
+async def _until_clicked(clicked: asyncio.Event, fetch: asyncio.Future) -> None:
+    """Until a row's popup is open, or its fetch is over (cached, failed, or run by another search)."""
+    waiter = asyncio.ensure_future(clicked.wait())
+    try:
+        await asyncio.wait([waiter, fetch], return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        waiter.cancel()
+
+
+async def _iter_rows(page, context, limit: int = 50, fetch_abstract: bool = True, offset: int = 0, timeout_ms: int = 20000, shared_abstracts: Optional[Dict[str, asyncio.Future]] = None, timer: Optional[StageTimer] = None, fetch_claims: bool = False, abstract_filter: Optional[Callable[[str], bool]] = None, columns: Optional[List[str]] = None) -> AsyncIterator[Dict[str, object]]:
     """
-    Extract rows from 簡易書誌 (Simple Bibliography) view table.
+    Extract rows from 簡易書誌 (Simple Bibliography) view table as a stream of events.
     Table ID: patentUtltyIntnlSimpleBibLst
     Columns: No., 文献番号, 出願番号, 出願日, 公知日, 発明の名称, 出願人/権利者, ステータス, FI, 各種機能
+
+    Walks subsequent result pages until `limit` rows after the first `offset` hits
+    have been read. Yields {"event": "row", ...} for every row as soon as its page is
+    read, then {"event": "abstract", ...} for each detail page in completion order.
+    The next result page is requested before the current page's rows are handed out,
+    so page loading overlaps row consumption and abstract fetching, unless a row of
+    the page has no fixed detail address: its popup is opened from the table, so
+    paging waits until those popups are open. Addresses found on such popups are
+    remembered, so the document is fetched by URL next time.
+
+    `shared_abstracts` maps document numbers to in-flight abstract fetches; searches
+    that pass the same dict (e.g. one batch) fetch each document only once.
+    With `fetch_claims`, 【特許請求の範囲】 is extracted from the same detail page
+    load and reported as "claims" next to "abstract". With `abstract_filter`, only
+    documents for which it returns True get their detail page opened. `columns`
+    limits the table cells read (see table_columns); others are left empty.
+    Time spent per stage is accumulated on `timer`.
     """
-    rows = await page.query_selector_all("table#patentUtltyIntnlSimpleBibLst tbody tr")
-    results: List[Dict[str, str]] = []
-    abstract_tasks = []  # Store tasks for parallel abstract fetching
+    timer = timer or StageTimer()
+    fields = ("abstract", "claims") if fetch_claims else ("abstract",)
+    abstract_tasks = []  # Abstract fetches run in the background while rows are consumed
+    document_numbers: List[str] = []
+    seen = set()
+    skipped = 0
+    advance = None
     
-    # Create semaphore to limit concurrent page opens (max 4 simultaneous)
-    semaphore = asyncio.Semaphore(4)
+    # Detail pages are reused across rows; concurrency (shared by all searches) adapts to observed timeouts
+    detail_pages = DetailPagePool(context)
+    limiter = get_detail_limiter()
     
-    for idx, row in enumerate(rows[:limit]):
-        cells = await row.query_selector_all("td")
-        
-        # No.
-        number = await _clean_text(await row.query_selector("th[scope='row'] p"))
-        
-        # 文献番号 (Document Number) - usually has a link
-        doc_num_el = await cells[0].query_selector("a") if len(cells) > 0 else None
-        doc_num = await _clean_text(doc_num_el) if doc_num_el else await _clean_text(cells[0]) if len(cells) > 0 else ""
-        
-        # 出願番号 (Application Number)
-        app_num = await _clean_text(cells[1]) if len(cells) > 1 else ""
-        
-        # 出願日 (Application Date)
-        app_date = await _clean_text(cells[2]) if len(cells) > 2 else ""
-        
-        # 公知日 (Publication Date)
-        pub_date = await _clean_text(cells[3]) if len(cells) > 3 else ""
-        
-        # 発明の名称 (Invention Title)
-        invention_title = await _clean_text(cells[4]) if len(cells) > 4 else ""
-        
-        # 出願人/権利者 (Applicant/Rights Holder)
-        applicant = await _clean_text(cells[5]) if len(cells) > 5 else ""
-        
-        # ステータス (Status) - may have multiple labels
-        status_labels = await cells[6].query_selector_all("label") if len(cells) > 6 else []
-        status_parts = []
-        for label in status_labels:
-            clean = await _clean_text(label)
-            if clean:
-                status_parts.append(clean)
-        status = " / ".join(status_parts)
-        if not status and len(cells) > 6:
-            status = await _clean_text(cells[6])
-        
-        # FI (Classification) - skip for speed (rarely used)
-        fi_codes = []
-        # Uncomment below if FI codes are needed, but it adds ~50ms per row
-        # fi_links = await cells[7].query_selector_all("a") if len(cells) > 7 else []
-        # fi_codes = []
-        # for link in fi_links:
-        #     clean = await _clean_text(link)
-        #     if clean:
-        #         fi_codes.append(clean)
-        
-        # 各種機能 (Various Functions) - skip for speed
-        actions = []
-        # Uncomment below if action buttons are needed
-        # action_links = await cells[8].query_selector_all("a") if len(cells) > 8 else []
-        # actions = []
-        # for link in action_links:
-        #     clean = await _clean_text(link)
-        #     if clean:
-        #         actions.append(clean)
-        
-        # Get document URL by clicking URL button (with reduced timeout)
-        doc_url = ""
-        # SKIP URL fetching - too slow (dialog wait + click)
-        # If needed in future, uncomment below, but it adds 300-500ms per row
-        # url_btn = await row.query_selector(f"a[id='patentUtltyIntnlSimpleBibLst_tableView_url{idx}']")
-        # if url_btn:
-        #     try:
-        #         await url_btn.click()
-        #         await page.wait_for_timeout(300)
-        #         dialog = await page.query_selector(".mat-dialog-container, [role='dialog']")
-        #         if dialog:
-        #             dialog_text = await dialog.inner_text()
-        #             url_match = re.search(r'(https://www\.j-platpat\.inpit\.go\.jp/[^\s]+)', dialog_text)
-        #             if url_match:
-        #                 doc_url = url_match.group(1)
-        #             await page.keyboard.press("Escape")
-        #             await page.wait_for_timeout(100)
-        #     except Exception:
-        #         pass
+    try:
+        with timer.stage("row_extraction"):
+            raw_rows = await page.evaluate(EXTRACT_ROWS_JS, [RESULT_ROWS_SELECTOR, offset + limit, columns])
+        while True:
+            fresh = [raw for raw in raw_rows if _row_key(raw) not in seen]
+            seen.update(_row_key(raw) for raw in fresh)
+            take = []
+            for raw in fresh:
+                if skipped < offset:
+                    skipped += 1
+                elif len(document_numbers) + len(take) < limit:
+                    take.append(raw)
+            
+            more = bool(fresh) and len(document_numbers) + len(take) < limit
+            # Fixed address from the table DOM, else derived from the number format, else
+            # found on an earlier popup of the document
+            urls = [row_document_url(raw["document_number"], raw["fixed_url"]) for raw in take]
+            unresolved = [raw["document_number"] for raw, url in zip(take, urls) if not url]
+            if unresolved:
+                learned = await _learned_urls(unresolved)
+                urls = [url or learned.get(raw["document_number"], "") for raw, url in zip(take, urls)]
+            # Rows still without one open their detail popup by clicking the link in this
+            # table, so paging must wait until those popups are open
+            needs_click = fetch_abstract and any(
+                raw["has_link"] and not url and (abstract_filter is None or abstract_filter(raw["document_number"]))
+                for raw, url in zip(take, urls)
+            )
+            clicks = []
+            
+            # Request the next page now; its rows are read after this page's are handed out
+            if more and not needs_click:
+                advance = asyncio.ensure_future(_advance_page(page, timeout_ms))
+            
+            for raw, doc_url in zip(take, urls):
+                idx = len(document_numbers)
+                document_numbers.append(raw["document_number"])
+                
+                # Get abstract from the detail page. The link locator is only used (clicked)
+                # when the document number has no known fixed URL, and costs nothing otherwise.
+                abstract_status = ABSTRACT_SKIPPED
+                if fetch_abstract and raw["has_link"] and (abstract_filter is None or abstract_filter(raw["document_number"])):
+                    doc_num_el = page.locator(f"{RESULT_ROWS_SELECTOR} td:first-child a", has_text=raw["document_number"]).first
+                    clicked = asyncio.Event() if not doc_url else None
+                    make_fetch = functools.partial(_fetch_abstract_for_row, context, doc_num_el, raw["document_number"], doc_url, detail_pages, limiter, DETAIL_TIMEOUT_MS, fields, clicked)
+                    if shared_abstracts is not None:
+                        fetch = _shared_fetch(shared_abstracts, raw["document_number"] + ("#claims" if fetch_claims else ""), make_fetch)
+                    else:
+                        fetch = make_fetch()
+                    abstract_tasks.append(asyncio.ensure_future(_indexed_abstract(idx, fetch, fields)))
+                    abstract_status = ABSTRACT_PENDING
+                    if clicked is not None:
+                        clicks.append((clicked, abstract_tasks[-1]))
+                
+                row = {
+                    "no": raw["no"],
+                    "document_number": raw["document_number"],
+                    "document_url": doc_url,
+                    "abstract": "",  # Filled in by a later "abstract" event
+                    "abstract_status": abstract_status,
+                    "application_number": raw["application_number"],
+                    "application_date": raw["application_date"],
+                    "publication_date": raw["publication_date"],
+                    "invention_title": raw["invention_title"],
+                    "applicant": raw["applicant"],
+                    "status": raw["status"],
+                    "fi_codes": raw["fi_codes"],
+                    "actions": raw["actions"],
+                }
+                if fetch_claims:
+                    row["claims"] = ""
+                yield {"event": "row", "index": idx, "row": row}
+            
+            if more and needs_click:
+                with timer.stage("pagination"):
+                    await asyncio.gather(*(_until_clicked(clicked, task) for clicked, task in clicks))
+                advance = asyncio.ensure_future(_advance_page(page, timeout_ms))
+            if advance is None:
+                break
+            with timer.stage("pagination"):
+                advanced = await advance
+            advance = None
+            if not advanced:
+                break
+            with timer.stage("row_extraction"):
+                raw_rows = await page.evaluate(EXTRACT_ROWS_JS, [RESULT_ROWS_SELECTOR, offset + limit, columns])
         
-        # Get abstract by clicking document link and opening detail page
-        abstract_task = None
-        if fetch_abstract and doc_num_el:
-            abstract_task = _fetch_abstract_for_row(context, doc_num_el, doc_num, idx, page, semaphore)
-            abstract_tasks.append(abstract_task)
+        for next_done in asyncio.as_completed(abstract_tasks):
+            # Only the time rows wait on abstracts still running after the table is read
+            with timer.stage("abstracts"):
+                idx, values, status = await next_done
+            yield {
+                "event": "abstract",
+                "index": idx,
+                "document_number": document_numbers[idx],
+                **values,
+                "abstract_status": status,
+            }
+    finally:
+        if advance is not None:
+            advance.cancel()
+        for task in abstract_tasks:
+            task.cancel()
+        await detail_pages.close()
+
+
+SEARCH_INPUT_SELECTOR = "input#s01_srchCondtn_txtSimpleSearch"
+SEARCH_BUTTON_SELECTOR = "a#s01_srchBtn_btnSearch"
+
+# Pages ready for the next search, one per context: pre-warmed on the simple search
+# screen (see open_search_page) or handed back by the previous search on its results
+_search_pages: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+async def _load_search_screen(page, timeout_ms: int) -> None:
+    await page.goto(JPLATPAT_URL, wait_until="domcontentloaded", timeout=timeout_ms)
+    await page.wait_for_selector(SEARCH_INPUT_SELECTOR, timeout=timeout_ms)
+
+
+async def open_search_page(context, timeout_ms: int = 20000):
+    """
+    Open a page on the simple search screen and keep it as the context's ready search
+    page: the next search run in the context types its query there instead of loading
+    the SPA first. Used by BrowserPool to pre-warm idle contexts.
+    """
+    page = await context.new_page()
+    try:
+        await _load_search_screen(page, timeout_ms)
+    except Exception:
+        await page.close()
+        raise
+    _search_pages[context] = page
+    return page
+
+
+def ready_search_page(context):
+    """The context's ready search page, if it has an open one."""
+    page = _search_pages.get(context)
+    return page if page is not None and not page.is_closed() else None
+
+
+def discard_search_page(context) -> None:
+    """Forget the context's ready search page (e.g. one idle for too long); it is not closed."""
+    _search_pages.pop(context, None)
+
+
+def _take_search_page(context):
+    page = _search_pages.pop(context, None)
+    if page is None or page.is_closed():
+        return None
+    return page
+
+
+async def _open_results(page, query: str, timeout_ms: int, timer: StageTimer, ready: bool = False) -> str:
+    """
+    Submit `query` on the simple search screen and return the result message.
+    With `ready`, the page is already on that screen (possibly showing an earlier
+    search's results) and is not reloaded first; the earlier results are marked so
+    that only the new ones count.
+    Waits for the result table or a zero-hit message rather than a fixed delay; a
+    search that shows neither in time is reloaded and retried (READY_RETRIES).
+    """
+    tracker = get_latency_tracker()
+    retries = ready_retries()
+
+    async def attempt(n: int) -> None:
+        # Only the first attempt reuses the page: an unchanged result list (e.g. the same
+        # query again) still looks stale and is reloaded on the retry
+        reuse = ready and n == 0 and await page.is_visible(SEARCH_INPUT_SELECTOR)
+        if reuse:
+            await page.evaluate(MARK_STALE_RESULTS_JS, [RESULT_ROWS_SELECTOR, RESULT_MESSAGE_SELECTOR])
         else:
-            abstract_tasks.append(asyncio.sleep(0))  # Placeholder for consistent indexing
-        
-        results.append({
-            "no": number,
-            "document_number": doc_num,
-            "document_url": doc_url,
-            "abstract": "",  # Placeholder, will be filled after parallel fetch
-            "application_number": app_num,
-            "application_date": app_date,
-            "publication_date": pub_date,
-            "invention_title": invention_title,
-            "applicant": applicant,
-            "status": status,
-            "fi_codes": fi_codes,
-            "actions": actions,
-        })
-    
-    # Execute all abstract fetching tasks in parallel
-    if abstract_tasks:
-        abstracts = await asyncio.gather(*abstract_tasks, return_exceptions=True)
-        for idx, abstract in enumerate(abstracts):
-            if isinstance(abstract, str):
-                results[idx]["abstract"] = abstract
-    
-    return results
+            with timer.stage("page_load"):
+                await _load_search_screen(page, timeout_ms)
+        await page.fill(SEARCH_INPUT_SELECTOR, query)
 
+        # Click the search button instead of pressing Enter
+        await page.click(SEARCH_BUTTON_SELECTOR)
 
-async def search_jplatpat_async(query: str, headless: bool = True, row_limit: int = 50, timeout_ms: int = 20000, fetch_abstract: bool = True) -> Dict[str, object]:
-    launch_args = ["--no-sandbox", "--disable-dev-shm-usage"]
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=headless, args=launch_args)
-        context = await browser.new_context(locale="ja-JP", user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+        started = time.perf_counter()
+        try:
+            with timer.stage("results_wait"):
+                await page.wait_for_function(
+                    RESULTS_READY_JS,
+                    arg=[RESULT_ROWS_SELECTOR, RESULT_MESSAGE_SELECTOR, ZERO_HIT_PATTERN, reuse],
+                    timeout=tracker.timeout_ms(SIGNAL_RESULTS, timeout_ms, n),
+                )
+        except PlaywrightTimeoutError:
+            # Out of retries but a result message is shown (e.g. an unknown zero-hit wording)
+            if n < retries or not await _clean_text(await page.query_selector(RESULT_MESSAGE_SELECTOR)):
+                raise
+            return
+        tracker.record(SIGNAL_RESULTS, (time.perf_counter() - started) * 1000)
+
+    await retry_async(attempt, retries)
+
+    message = ""
+    msg_el = await page.query_selector(RESULT_MESSAGE_SELECTOR)
+    if msg_el:
+        message = await _clean_text(msg_el)
+    return message
+
+
+async def _iter_search_in_context(context, query: str, row_limit: int, timeout_ms: int, fetch_abstract: bool, offset: int = 0, shared_abstracts: Optional[Dict[str, asyncio.Future]] = None, timer: Optional[StageTimer] = None, fetch_claims: bool = False, abstract_filter: Optional[Callable[[str], bool]] = None, columns: Optional[List[str]] = None) -> AsyncIterator[Dict[str, object]]:
+    """
+    Run one search on an already open browser context, streaming events.
+    The context's ready search page is used when it has one. Unless the search
+    failed, its page is then left open as the context's ready search page, so the
+    next search in the context submits its query there without reloading the SPA;
+    other pages used here are closed. The context itself belongs to the caller.
+    """
+    timer = timer or StageTimer()
+    page = _take_search_page(context)
+    ready = page is not None
+    if page is None:
         page = await context.new_page()
+    reusable = False
+    try:
+        message = await _open_results(page, query, timeout_ms, timer, ready)
+        reusable = True
+        yield {"event": "meta", "query": query, "message": message}
 
-        try:
-            await page.goto(JPLATPAT_URL, wait_until="domcontentloaded", timeout=timeout_ms)
-            await page.wait_for_selector("input#s01_srchCondtn_txtSimpleSearch", timeout=timeout_ms)
-            await page.fill("input#s01_srchCondtn_txtSimpleSearch", query)
+        count = 0
+        async for event in _iter_rows(page, context, limit=row_limit, fetch_abstract=fetch_abstract, offset=offset, timeout_ms=timeout_ms, shared_abstracts=shared_abstracts, timer=timer, fetch_claims=fetch_claims, abstract_filter=abstract_filter, columns=columns):
+            if event["event"] == "row":
+                count += 1
+            yield event
+        # A full page of rows means there may be more hits after this one
+        yield {
+            "event": "done",
+            "count": count,
+            "next_offset": offset + count if count >= row_limit else None,
+            "timings": timer.as_dict(),
+        }
+    except PlaywrightTimeoutError as exc:
+        reusable = False
+        raise RuntimeError(f"Timed out waiting for page elements: {exc}") from exc
+    except Exception:
+        reusable = False
+        raise
+    finally:
+        if reusable and not page.is_closed():
+            _search_pages[context] = page
+        else:
+            await page.close()
 
-            # Click the search button instead of pressing Enter
-            await page.click("a#s01_srchBtn_btnSearch")
 
-            # Wait for results table with aggressive timeout
-            try:
-                await asyncio.wait_for(
-                    page.wait_for_selector("table#patentUtltyIntnlSimpleBibLst tbody tr"),
-                    timeout=8.0
-                )
-            except (asyncio.TimeoutError, PlaywrightTimeoutError, Exception):
-                # If table doesn't appear, wait minimally and continue
-                await page.wait_for_timeout(1000)
-
-            message = ""
-            msg_el = await page.query_selector("#patentUtltyIntnlDocLst_searchResultMsg")
-            if msg_el:
-                message = await _clean_text(msg_el)
-
-            rows = await _extract_rows(page, context, limit=row_limit, fetch_abstract=fetch_abstract)
-            return {
-                "query": query,
-                "message": message,
-                "count": len(rows),
-                "rows": rows,
-            }
-        except PlaywrightTimeoutError as exc:
-            raise RuntimeError(f"Timed out waiting for page elements: {exc}") from exc
+async def iter_search_jplatpat_async(query: str, headless: bool = True, row_limit: int = 50, timeout_ms: int = 20000, fetch_abstract: bool = True, context=None, offset: int = 0, shared_abstracts: Optional[Dict[str, asyncio.Future]] = None, fetch_claims: bool = False, abstract_filter: Optional[Callable[[str], bool]] = None, fields: Optional[Sequence[str]] = None) -> AsyncIterator[Dict[str, object]]:
+    """
+    Streaming variant of search_jplatpat_async. Yields, in order:
+    one "meta" event (query, result message), a "row" event per result row,
+    "abstract" events as detail pages complete, and a final "done" event
+    (row count, the offset of the next block of hits if any, and per-stage
+    timings in milliseconds). With `fetch_claims`, rows and abstract events
+    also carry "claims" (needs `fetch_abstract`). `abstract_filter(document_number)`
+    limits abstract fetching to the documents it accepts. `fields` (see parse_fields)
+    prunes the work to what the projection needs: unrequested table cells are not
+    read and detail pages are only opened for "abstract" / "claims". Rows keep
+    every key either way; project them with project_row.
+    """
+    timer = StageTimer()
+    fetch_abstract, fetch_claims = detail_work(fields, fetch_abstract, fetch_claims)
+    columns = table_columns(fields)
+    if context is not None:
+        async for event in _iter_search_in_context(context, query, row_limit, timeout_ms, fetch_abstract, offset, shared_abstracts, timer, fetch_claims, abstract_filter, columns):
+            yield event
+        return
+
+    async with async_playwright() as p:
+        with timer.stage("browser_launch"):
+            browser = await p.chromium.launch(headless=headless, args=LAUNCH_ARGS)
+            context = await new_context(browser)
+        try:
+            async for event in _iter_search_in_context(context, query, row_limit, timeout_ms, fetch_abstract, offset, shared_abstracts, timer, fetch_claims, abstract_filter, columns):
+                yield event
         finally:
             await context.close()
             await browser.close()
+
+
+async def collect_search_events(events: AsyncIterator[Dict[str, object]], query: str, offset: int = 0, include_timings: bool = False) -> Dict[str, object]:
+    """Fold an iter_search_jplatpat_async event stream into the search result dict."""
+    result: Dict[str, object] = {"query": query, "message": "", "count": 0, "offset": offset, "next_offset": None, "rows": []}
+    rows: List[Dict[str, object]] = result["rows"]
+    async for event in events:
+        if event["event"] == "meta":
+            result["message"] = event["message"]
+        elif event["event"] == "row":
+            rows.append(event["row"])
+        elif event["event"] == "abstract":
+            rows[event["index"]].update({k: v for k, v in event.items() if k not in ("event", "index", "document_number")})
+        elif event["event"] == "done":
+            result["next_offset"] = event["next_offset"]
+            if include_timings:
+                result["timings"] = event["timings"]
+    result["count"] = len(rows)
+    return result
+
+
+async def search_jplatpat_async(query: str, headless: bool = True, row_limit: int = 50, timeout_ms: int = 20000, fetch_abstract: bool = True, context=None, offset: int = 0, shared_abstracts: Optional[Dict[str, asyncio.Future]] = None, include_timings: bool = False, fetch_claims: bool = False, fields: Optional[Sequence[str]] = None) -> Dict[str, object]:
+    """
+    Search J-PlatPat. When `context` is given (e.g. leased from a BrowserPool) it is used
+    as is; otherwise a browser is launched for this call and closed afterwards.
+    `offset` skips that many hits; result pages are walked until `row_limit` rows are read.
+    `shared_abstracts` deduplicates abstract fetches across searches (see _iter_rows).
+    With `include_timings`, the result carries per-stage timings in milliseconds.
+    With `fetch_claims`, each row also gets the 【特許請求の範囲】 text as "claims".
+    With `fields`, only those fields are extracted and returned per row.
+    """
+    events = iter_search_jplatpat_async(query, headless=headless, row_limit=row_limit, timeout_ms=timeout_ms, fetch_abstract=fetch_abstract, context=context, offset=offset, shared_abstracts=shared_abstracts, fetch_claims=fetch_claims, fields=fields)
+    result = await collect_search_events(events, query, offset=offset, include_timings=include_timings)
+    result["rows"] = [project_row(row, fields) for row in result["rows"]]
+    return result
@@ -0,0 +1,228 @@
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+
+from jplatpat_scraper_async import ABSTRACT_PENDING
+
+DATE_FIELDS = ("application_date", "publication_date")
+
+# Indexed text columns; the trigram tokenizer matches any substring of 3+ characters,
+# which suits Japanese text without word boundaries
+TEXT_COLUMNS = ("invention_title", "applicant", "abstract", "claims", "fi_codes")
+
+_DATE = re.compile(r"(\d{4})\D+(\d{1,2})\D+(\d{1,2})")
+_TERM_SPLIT = re.compile(r"[\s　]+")
+
+
+def normalize_date(value: str) -> str:
+    """"2023.08.20" / "2023/8/20" -> "2023-08-20"; "" when no date is found."""
+    match = _DATE.search(value or "")
+    if not match:
+        return ""
+    year, month, day = match.groups()
+    return f"{year}-{int(month):02d}-{int(day):02d}"
+
+
+def _like_pattern(term: str) -> str:
+    return "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+class LocalIndex:
+    """
+    Full-text index of every row scraped so far, in SQLite with an FTS5 trigram
+    index over title, applicant, abstract, claims and FI codes. Rows are keyed by
+    document number; a re-scraped document updates its row but keeps previously
+    indexed values (e.g. the abstract) that the new scrape left empty.
+    """
+
+    def __init__(self, db_path: str = "jplatpat_index.sqlite3"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=5.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " document_number TEXT PRIMARY KEY, row TEXT NOT NULL,"
+            " invention_title TEXT NOT NULL, applicant TEXT NOT NULL, abstract TEXT NOT NULL,"
+            " claims TEXT NOT NULL, fi_codes TEXT NOT NULL, status TEXT NOT NULL,"
+            " application_date TEXT NOT NULL, publication_date TEXT NOT NULL,"
+            " first_seen_at REAL NOT NULL, updated_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS documents_publication_date ON documents (publication_date);"
+            "CREATE INDEX IF NOT EXISTS documents_application_date ON documents (application_date);"
+            "CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5("
+            " invention_title, applicant, abstract, claims, fi_codes,"
+            " content='documents', content_rowid='rowid', tokenize='trigram');"
+            # Keep the external-content FTS table in sync with documents
+            "CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN"
+            " INSERT INTO documents_fts (rowid, invention_title, applicant, abstract, claims, fi_codes)"
+            " VALUES (new.rowid, new.invention_title, new.applicant, new.abstract, new.claims, new.fi_codes); END;"
+            "CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN"
+            " INSERT INTO documents_fts (documents_fts, rowid, invention_title, applicant, abstract, claims, fi_codes)"
+            " VALUES ('delete', old.rowid, old.invention_title, old.applicant, old.abstract, old.claims, old.fi_codes); END;"
+            "CREATE TRIGGER IF NOT EXISTS documents_au AFTER UPDATE ON documents BEGIN"
+            " INSERT INTO documents_fts (documents_fts, rowid, invention_title, applicant, abstract, claims, fi_codes)"
+            " VALUES ('delete', old.rowid, old.invention_title, old.applicant, old.abstract, old.claims, old.fi_codes);"
+            " INSERT INTO documents_fts (rowid, invention_title, applicant, abstract, claims, fi_codes)"
+            " VALUES (new.rowid, new.invention_title, new.applicant, new.abstract, new.claims, new.fi_codes); END;"
+        )
+        self._db.commit()
+
+    @classmethod
+    def from_env(cls) -> Optional["LocalIndex"]:
+        """Configured from LOCAL_INDEX_* variables; None when indexing is disabled."""
+        if os.environ.get("LOCAL_INDEX_ENABLED", "true").lower() not in ("1", "true", "yes"):
+            return None
+        return cls(db_path=os.environ.get("LOCAL_INDEX_PATH", "jplatpat_index.sqlite3"))
+
+    def add_rows(self, rows: Iterable[Dict[str, object]]) -> int:
+        """Insert or refresh result rows in one transaction; returns how many were written."""
+        now = time.time()
+        written = 0
+        with self._lock:
+            for row in rows:
+                doc_num = str(row.get("document_number") or "").strip()
+                if not doc_num:
+                    continue
+                found = self._db.execute("SELECT row FROM documents WHERE document_number = ?", (doc_num,)).fetchone()
+                row = dict(row)
+                if found is not None:
+                    stored = json.loads(found[0])
+                    if stored.get("abstract") and not row.get("abstract"):
+                        row["abstract_status"] = stored.get("abstract_status", "")
+                    # Fields this scrape left empty (not fetched, or not in a projection)
+                    row = {**stored, **{key: value for key, value in row.items() if value or key not in stored}}
+                row.pop("query", None)
+                fi_codes = row.get("fi_codes") or []
+                self._db.execute(
+                    "INSERT INTO documents (document_number, row, invention_title, applicant, abstract, claims, fi_codes,"
+                    " status, application_date, publication_date, first_seen_at, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (document_number) DO UPDATE SET row = excluded.row, invention_title = excluded.invention_title,"
+                    " applicant = excluded.applicant, abstract = excluded.abstract, claims = excluded.claims,"
+                    " fi_codes = excluded.fi_codes, status = excluded.status, application_date = excluded.application_date,"
+                    " publication_date = excluded.publication_date, updated_at = excluded.updated_at",
+                    (
+                        doc_num,
+                        json.dumps(row, ensure_ascii=False),
+                        row.get("invention_title") or "",
+                        row.get("applicant") or "",
+                        row.get("abstract") or "",
+                        row.get("claims") or "",
+                        " ".join(fi_codes) if isinstance(fi_codes, list) else str(fi_codes),
+                        row.get("status") or "",
+                        normalize_date(row.get("application_date") or ""),
+                        normalize_date(row.get("publication_date") or ""),
+                        now,
+                        now,
+                    ),
+                )
+                written += 1
+            self._db.commit()
+        return written
+
+    def search(self, query: str = "", applicant: str = "", status: str = "", date_from: str = "", date_to: str = "", date_field: str = "publication_date", limit: int = 50, offset: int = 0) -> Dict[str, object]:
+        """
+        Rows matching every whitespace-separated term of `query` (substring match over
+        the indexed text), filtered by applicant / status substrings and an inclusive
+        `date_from`..`date_to` range on `date_field`. Terms of 3+ characters use the
+        trigram index and results are ranked by relevance; otherwise newest first.
+        """
+        if date_field not in DATE_FIELDS:
+            raise ValueError(f"date_field must be one of {', '.join(DATE_FIELDS)}")
+        started = time.perf_counter()
+        terms = [term for term in _TERM_SPLIT.split(query.strip()) if term]
+        match_terms = [term for term in terms if len(term) >= 3]
+        where: List[str] = []
+        params: List[object] = []
+        if match_terms:
+            where.append("documents_fts MATCH ?")
+            params.append(" AND ".join('"' + term.replace('"', '""') + '"' for term in match_terms))
+        for term in terms:
+            if len(term) < 3:
+                # Too short for a trigram lookup: scan the candidate rows instead
+                where.append("(" + " OR ".join(f"d.{column} LIKE ? ESCAPE '\\'" for column in TEXT_COLUMNS) + ")")
+                params.extend([_like_pattern(term)] * len(TEXT_COLUMNS))
+        if applicant:
+            where.append("d.applicant LIKE ? ESCAPE '\\'")
+            params.append(_like_pattern(applicant))
+        if status:
+            where.append("d.status LIKE ? ESCAPE '\\'")
+            params.append(_like_pattern(status))
+        if date_from:
+            where.append(f"d.{date_field} != '' AND d.{date_field} >= ?")
+            params.append(normalize_date(date_from) or date_from)
+        if date_to:
+            where.append(f"d.{date_field} != '' AND d.{date_field} <= ?")
+            params.append(normalize_date(date_to) or date_to)
+
+        source = "documents d JOIN documents_fts ON documents_fts.rowid = d.rowid" if match_terms else "documents d"
+        condition = " WHERE " + " AND ".join(where) if where else ""
+        order = "documents_fts.rank" if match_terms else f"d.{date_field} DESC, d.document_number"
+        with self._lock:
+            total = self._db.execute(f"SELECT COUNT(*) FROM {source}{condition}", params).fetchone()[0]
+            found = self._db.execute(
+                f"SELECT d.row, d.updated_at FROM {source}{condition} ORDER BY {order} LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            ).fetchall()
+        rows = [{**json.loads(r[0]), "indexed_at": r[1]} for r in found]
+        return {
+            "query": query,
+            "total": total,
+            "count": len(rows),
+            "offset": offset,
+            "next_offset": offset + len(rows) if offset + len(rows) < total else None,
+            "rows": rows,
+            "took_ms": round((time.perf_counter() - started) * 1000.0, 2),
+        }
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            documents = self._db.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        return {"documents": documents}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_default_index: Optional[LocalIndex] = None
+_default_loaded = False
+
+
+def get_local_index() -> Optional[LocalIndex]:
+    """Process-wide index fed by the API and the CLIs, configured from the environment."""
+    global _default_index, _default_loaded
+    if not _default_loaded:
+        _default_index = LocalIndex.from_env()
+        _default_loaded = True
+    return _default_index
+
+
+async def index_events(events: AsyncIterator[Dict[str, object]], index: Optional[LocalIndex] = None) -> AsyncIterator[Dict[str, object]]:
+    """
+    Pass an iter_search_jplatpat_async event stream through unchanged and add its rows
+    (with their abstracts) to the local index once the stream ends, also when it fails.
+    The write runs in a worker thread so it does not block the event loop.
+    """
+    index = index or get_local_index()
+    if index is None:
+        async for event in events:
+            yield event
+        return
+    rows: Dict[int, Dict[str, object]] = {}
+    try:
+        async for event in events:
+            if event["event"] == "row":
+                rows[event["index"]] = dict(event["row"])
+            elif event["event"] == "abstract" and event["index"] in rows:
+                rows[event["index"]].update({k: v for k, v in event.items() if k not in ("event", "index", "document_number")})
+            yield event
+    finally:
+        await asyncio.to_thread(index.add_rows, [row for row in rows.values() if row.get("abstract_status") != ABSTRACT_PENDING])
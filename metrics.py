@@ -0,0 +1,70 @@
+from typing import Callable, Dict, Iterable, Optional, Set
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0, 120.0)
+
+STAGE_SECONDS = Histogram(
+    "jplatpat_stage_seconds",
+    "Wall time per search stage (browser_launch, page_load, results_wait, row_extraction, pagination, abstracts, total)",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+SEARCHES = Counter("jplatpat_searches", "Searches run against J-PlatPat by outcome", ["outcome"])
+ABSTRACTS = Counter("jplatpat_abstracts", "Abstract fetches by abstract_status (ok, none, timeout, error)", ["status"])
+
+class _StatsCollector:
+    """Exports the stats() dicts of long-lived components (pool, caches, ...) at scrape time."""
+
+    def __init__(self):
+        self.sources: Dict[str, Callable[[], Optional[Dict[str, object]]]] = {}
+        self.counters: Dict[str, Set[str]] = {}
+
+    def collect(self):
+        for source, read in list(self.sources.items()):
+            counters = self.counters.get(source, set())
+            stats = read()
+            if not stats:
+                continue
+            for key, value in stats.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"jplatpat_{source}_{key}"
+                if key in counters:
+                    yield CounterMetricFamily(name, f"{source} {key}", value=value)
+                else:
+                    yield GaugeMetricFamily(name, f"{source} {key}", value=value)
+
+
+_stats_collector = _StatsCollector()
+REGISTRY.register(_stats_collector)
+
+
+def register_stats(source: str, read: Callable[[], Optional[Dict[str, object]]], counters: Iterable[str] = ()) -> None:
+    """
+    Export `read()` (a stats dict, or None when the component is disabled) under
+    jplatpat_<source>_*. Keys in `counters` (the component's COUNTER_STATS: values
+    that only ever grow) are exported as counters, all others as gauges.
+    """
+    _stats_collector.sources[source] = read
+    _stats_collector.counters[source] = set(counters)
+
+
+def observe_event(event: Dict[str, object]) -> None:
+    """Record an iter_search_jplatpat_async event."""
+    if event["event"] == "abstract":
+        ABSTRACTS.labels(status=event["abstract_status"]).inc()
+    elif event["event"] == "done":
+        SEARCHES.labels(outcome="ok").inc()
+        for stage, milliseconds in event.get("timings", {}).items():
+            STAGE_SECONDS.labels(stage=stage).observe(milliseconds / 1000.0)
+
+
+def observe_failure() -> None:
+    SEARCHES.labels(outcome="error").inc()
+
+
+def render_latest() -> tuple:
+    """Prometheus text exposition of the default registry: (body, content type)."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,169 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, TypeVar
+
+from playwright.async_api import Error as PlaywrightError
+
+T = TypeVar("T")
+
+RESULT_MESSAGE_SELECTOR = "#patentUtltyIntnlDocLst_searchResultMsg"
+
+# Result message (or dialog) text that means the search matched nothing
+ZERO_HIT_PATTERN = os.environ.get("JPLATPAT_ZERO_HIT_PATTERN") or r"見つかりませんでした|該当する(文献|データ)はありません|(^|[^0-9０-９,，])[0０]\s*件"
+
+# "rows" once the result table has rows, "empty" once a zero-hit message is shown,
+# falsy (keep waiting) otherwise. With `fresh`, rows and messages still showing what
+# they showed when MARK_STALE_RESULTS_JS ran (a previous search's results) do not count.
+RESULTS_READY_JS = """
+([rowsSelector, messageSelector, zeroHit, fresh]) => {
+    const current = (el) => el && !(fresh && el.__jplatpatStale === (el.innerText || ""));
+    if (Array.from(document.querySelectorAll(rowsSelector)).some(current)) {
+        return "rows";
+    }
+    const pattern = new RegExp(zeroHit);
+    const candidates = [document.querySelector(messageSelector), ...document.querySelectorAll(".mat-dialog-container, [role='dialog']")];
+    return candidates.some((el) => current(el) && pattern.test(el.innerText || "")) ? "empty" : false;
+}
+"""
+
+# Marks the result rows and messages on screen with their current text before a search
+# is submitted on a page that already shows results (see RESULTS_READY_JS `fresh`)
+MARK_STALE_RESULTS_JS = """
+([rowsSelector, messageSelector]) => {
+    const shown = [...document.querySelectorAll(rowsSelector), document.querySelector(messageSelector), ...document.querySelectorAll(".mat-dialog-container, [role='dialog']")];
+    shown.forEach((el) => {
+        if (el) {
+            el.__jplatpatStale = el.innerText || "";
+        }
+    });
+}
+"""
+
+# Ready once 【要約】 is rendered, or once the document body is clearly there without one
+DETAIL_READY_JS = """
+() => {
+    const text = document.body ? document.body.innerText : "";
+    if (text.includes("【要約】")) {
+        return true;
+    }
+    return document.readyState === "complete" && /【(発明|考案)の名称】|請求の範囲】/.test(text);
+}
+"""
+
+SIGNAL_RESULTS = "results"
+SIGNAL_DETAIL = "detail"
+
+
+class LatencyTracker:
+    """
+    Sliding window of how long each readiness signal took to appear.
+
+    The first wait for a signal uses `multiplier` x the observed `percentile` as its
+    timeout (clamped to [floor_ms, the caller's timeout]), so a stuck page is given up
+    on and retried early instead of burning the whole budget. Until `min_samples`
+    waits have been seen, the caller's timeout is used as is.
+    """
+
+    def __init__(self, window: int = 200, percentile: float = 95.0, multiplier: float = 3.0, min_samples: int = 10, floor_ms: int = 1000):
+        self.window = max(1, window)
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_samples = max(1, min_samples)
+        self.floor_ms = floor_ms
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self.retries = 0
+
+    @classmethod
+    def from_env(cls) -> "LatencyTracker":
+        return cls(
+            window=int(os.environ.get("READY_WINDOW", "200")),
+            percentile=float(os.environ.get("READY_TIMEOUT_PERCENTILE", "95")),
+            multiplier=float(os.environ.get("READY_TIMEOUT_MULTIPLIER", "3")),
+            min_samples=int(os.environ.get("READY_MIN_SAMPLES", "10")),
+            floor_ms=int(os.environ.get("READY_TIMEOUT_FLOOR_MS", "1000")),
+        )
+
+    def record(self, signal: str, elapsed_ms: float) -> None:
+        with self._lock:
+            self._samples.setdefault(signal, deque(maxlen=self.window)).append(elapsed_ms)
+
+    def _percentile(self, signal: str, pct: float) -> float:
+        with self._lock:
+            ordered = sorted(self._samples.get(signal, ()))
+        if not ordered:
+            return 0.0
+        rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+        return ordered[rank]
+
+    def timeout_ms(self, signal: str, ceiling_ms: int, attempt: int = 0) -> int:
+        """Timeout for waiting on `signal`; retries (attempt > 0) always get the full `ceiling_ms`."""
+        with self._lock:
+            samples = len(self._samples.get(signal, ()))
+        if attempt > 0 or samples < self.min_samples:
+            return ceiling_ms
+        adaptive = self._percentile(signal, self.percentile) * self.multiplier
+        return int(min(ceiling_ms, max(self.floor_ms, adaptive)))
+
+    COUNTER_STATS = ("retries",)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            signals = list(self._samples)
+        stats: Dict[str, float] = {"retries": self.retries}
+        for signal in signals:
+            stats[f"{signal}_p50_ms"] = round(self._percentile(signal, 50), 1)
+            stats[f"{signal}_p95_ms"] = round(self._percentile(signal, 95), 1)
+        return stats
+
+
+_default_tracker = None
+
+
+def get_latency_tracker() -> LatencyTracker:
+    """Process-wide tracker shared by both scrapers, configured from the environment."""
+    global _default_tracker
+    if _default_tracker is None:
+        _default_tracker = LatencyTracker.from_env()
+    return _default_tracker
+
+
+def ready_retries() -> int:
+    return max(0, int(os.environ.get("READY_RETRIES", "1")))
+
+
+def _backoff_seconds(attempt: int) -> float:
+    return int(os.environ.get("READY_RETRY_BACKOFF_MS", "500")) * (2 ** attempt) / 1000.0
+
+
+async def retry_async(run: Callable[[int], Awaitable[T]], retries: int = None) -> T:
+    """
+    Call `run(attempt)` until it succeeds, retrying Playwright errors (timeouts,
+    navigation failures) up to `retries` times with exponential backoff.
+    """
+    retries = ready_retries() if retries is None else retries
+    for attempt in range(retries + 1):
+        try:
+            return await run(attempt)
+        except PlaywrightError:
+            if attempt == retries:
+                raise
+            get_latency_tracker().retries += 1
+            await asyncio.sleep(_backoff_seconds(attempt))
+
+
+def retry_sync(run: Callable[[int], T], retries: int = None) -> T:
+    """Blocking variant of retry_async for the sync scraper."""
+    retries = ready_retries() if retries is None else retries
+    for attempt in range(retries + 1):
+        try:
+            return run(attempt)
+        except PlaywrightError:
+            if attempt == retries:
+                raise
+            get_latency_tracker().retries += 1
+            time.sleep(_backoff_seconds(attempt))
@@ -0,0 +1,106 @@
+import os
+from typing import Dict, Iterable, Optional
+
+# Nothing in the result table or the 【要約】 text depends on these
+DEFAULT_BLOCKED_TYPES = ("image", "font", "media", "stylesheet")
+
+# Analytics / tag managers loaded by the SPA
+DEFAULT_BLOCKED_URL_PATTERNS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "/gtag/js",
+)
+
+
+def _split(value: str) -> tuple:
+    return tuple(part.strip() for part in value.split(",") if part.strip())
+
+
+class ResourcePolicy:
+    """
+    Allow/deny policy for network requests made by J-PlatPat pages.
+
+    A request is blocked when its resource type is in `blocked_types` or its URL
+    contains one of `blocked_url_patterns`, unless its URL contains one of
+    `allowed_url_patterns` (the allow list always wins).
+    """
+
+    def __init__(self, blocked_types: Iterable[str] = DEFAULT_BLOCKED_TYPES, blocked_url_patterns: Iterable[str] = DEFAULT_BLOCKED_URL_PATTERNS, allowed_url_patterns: Iterable[str] = ()):
+        self.blocked_types = frozenset(blocked_types)
+        self.blocked_url_patterns = tuple(blocked_url_patterns)
+        self.allowed_url_patterns = tuple(allowed_url_patterns)
+        self.blocked = 0
+        self.allowed = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["ResourcePolicy"]:
+        """Build the policy from JPLATPAT_BLOCK_* variables; None when blocking is disabled."""
+        if os.environ.get("JPLATPAT_BLOCK_RESOURCES", "true").lower() not in ("1", "true", "yes"):
+            return None
+        types = os.environ.get("JPLATPAT_BLOCK_RESOURCE_TYPES")
+        urls = os.environ.get("JPLATPAT_BLOCK_URL_PATTERNS")
+        return cls(
+            blocked_types=_split(types) if types is not None else DEFAULT_BLOCKED_TYPES,
+            blocked_url_patterns=_split(urls) if urls is not None else DEFAULT_BLOCKED_URL_PATTERNS,
+            allowed_url_patterns=_split(os.environ.get("JPLATPAT_ALLOW_URL_PATTERNS", "")),
+        )
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        if any(pattern in url for pattern in self.allowed_url_patterns):
+            return False
+        return resource_type in self.blocked_types or any(pattern in url for pattern in self.blocked_url_patterns)
+
+    COUNTER_STATS = ("blocked", "allowed")
+
+    def stats(self) -> Dict[str, int]:
+        return {"blocked": self.blocked, "allowed": self.allowed}
+
+
+_default_policy: Optional[ResourcePolicy] = None
+_default_loaded = False
+
+
+def get_resource_policy() -> Optional[ResourcePolicy]:
+    """Process-wide policy shared by both scrapers, configured from the environment."""
+    global _default_policy, _default_loaded
+    if not _default_loaded:
+        _default_policy = ResourcePolicy.from_env()
+        _default_loaded = True
+    return _default_policy
+
+
+async def install_async(context, policy: Optional[ResourcePolicy] = None) -> None:
+    """Install the policy as a route handler on an async Playwright context."""
+    policy = policy or get_resource_policy()
+    if policy is None:
+        return
+
+    async def handle(route):
+        request = route.request
+        if policy.should_block(request.resource_type, request.url):
+            policy.blocked += 1
+            await route.abort()
+        else:
+            policy.allowed += 1
+            await route.continue_()
+
+    await context.route("**/*", handle)
+
+
+def install_sync(context, policy: Optional[ResourcePolicy] = None) -> None:
+    """Install the policy as a route handler on a sync Playwright context."""
+    policy = policy or get_resource_policy()
+    if policy is None:
+        return
+
+    def handle(route):
+        request = route.request
+        if policy.should_block(request.resource_type, request.url):
+            policy.blocked += 1
+            route.abort()
+        else:
+            policy.allowed += 1
+            route.continue_()
+
+    context.route("**/*", handle)
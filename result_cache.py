@@ -0,0 +1,119 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+from admission import AdmissionRejected
+
+# abstract_status values of rows whose abstract may well be there on the next try
+PARTIAL_ABSTRACT_STATUSES = ("timeout", "error")
+
+
+class QueryResultCache:
+    """
+    TTL cache for whole search results with single-flight coalescing.
+
+    Concurrent calls for the same key share one upstream scrape: the first caller
+    starts it as a task and everyone else awaits that task. The scrape is shielded,
+    so a disconnecting client does not cancel it for the others. If admission turns
+    the first caller away, the others retry under their own admission.
+
+    Results with rows whose abstract timed out or failed are kept only for
+    `partial_ttl_seconds` (0, the default, does not cache them at all).
+    """
+
+    def __init__(self, ttl_seconds: float = 300.0, max_entries: int = 256, partial_ttl_seconds: float = 0.0):
+        self.ttl_seconds = ttl_seconds
+        self.partial_ttl_seconds = partial_ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[Hashable, Tuple[Dict[str, object], float, float]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @classmethod
+    def from_env(cls) -> "QueryResultCache":
+        return cls(
+            ttl_seconds=float(os.environ.get("RESULT_CACHE_TTL", "300")),
+            max_entries=int(os.environ.get("RESULT_CACHE_SIZE", "256")),
+            partial_ttl_seconds=float(os.environ.get("RESULT_CACHE_PARTIAL_TTL", "0")),
+        )
+
+    @staticmethod
+    def make_key(query: str, limit: int, fetch_abstract: bool, offset: int = 0, fetch_claims: bool = False, fields: Optional[Sequence[str]] = None) -> Tuple[str, int, bool, int, bool, Optional[Tuple[str, ...]]]:
+        """Normalize request parameters so trivially different queries share an entry."""
+        return (" ".join(query.split()), limit, fetch_abstract, offset, fetch_claims, tuple(sorted(fields)) if fields is not None else None)
+
+    def _lookup(self, key: Hashable):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        result, fetched_at, ttl = entry
+        if ttl <= 0 or time.time() - fetched_at > ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key: Hashable, result: Dict[str, object], fetched_at: float) -> None:
+        partial = any(row.get("abstract_status") in PARTIAL_ABSTRACT_STATUSES for row in result.get("rows", ()))
+        ttl = min(self.partial_ttl_seconds, self.ttl_seconds) if partial else self.ttl_seconds
+        if ttl <= 0:
+            return
+        self._entries[key] = (result, fetched_at, ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _run(self, key: Hashable, fetch: Callable[[], Awaitable[Dict[str, object]]]) -> Tuple[Dict[str, object], float]:
+        try:
+            result = await fetch()
+            fetched_at = time.time()
+            self._store(key, result, fetched_at)
+            return result, fetched_at
+        finally:
+            self._inflight.pop(key, None)
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Dict[str, object]]]) -> Tuple[Dict[str, object], bool, float]:
+        """
+        Return (result, cached, age_seconds). `cached` is False only for the caller
+        whose request actually triggered the upstream scrape.
+        """
+        while True:
+            entry = self._lookup(key)
+            if entry is not None:
+                self.hits += 1
+                result, fetched_at, _ = entry
+                return result, True, time.time() - fetched_at
+
+            task = self._inflight.get(key)
+            if task is None:
+                break
+            self.coalesced += 1
+            try:
+                result, fetched_at = await asyncio.shield(task)
+            except AdmissionRejected:
+                # The leader was turned away for its own client or wait budget; ours may differ
+                continue
+            return result, True, time.time() - fetched_at
+
+        self.misses += 1
+        task = asyncio.ensure_future(self._run(key, fetch))
+        # Mark a failure as retrieved even if every waiter has gone away
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._inflight[key] = task
+        result, fetched_at = await asyncio.shield(task)
+        return result, False, time.time() - fetched_at
+
+    COUNTER_STATS = ("hits", "misses", "coalesced")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
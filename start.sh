@@ -0,0 +1,14 @@
+#!/bin/sh
+# Container entrypoint. With WEB_CONCURRENCY > 1, one shared Chromium is started
+# (browser_server.py) and every uvicorn worker leases its contexts over CDP.
+set -e
+
+WORKERS="${WEB_CONCURRENCY:-1}"
+
+if [ "$WORKERS" -gt 1 ] && [ -z "$BROWSER_CDP_ENDPOINT" ]; then
+    CDP_PORT="${BROWSER_CDP_PORT:-9222}"
+    python browser_server.py --port "$CDP_PORT" &
+    export BROWSER_CDP_ENDPOINT="http://127.0.0.1:${CDP_PORT}"
+fi
+
+exec python -m uvicorn api:app --host 0.0.0.0 --port "${PORT:-8000}" --workers "$WORKERS"
@@ -0,0 +1,297 @@
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set
+
+from jplatpat_scraper_async import ABSTRACT_ERROR, ABSTRACT_NONE, ABSTRACT_OK, ABSTRACT_TIMEOUT, collect_search_events
+
+# Fields a watch stores and replays as a search request
+WATCH_REQUEST_FIELDS = ("query", "limit", "timeout", "fetch_abstract", "fetch_claims")
+
+# search(request, abstract_filter) -> event stream of iter_search_jplatpat_async
+WatchSearch = Callable[[Dict[str, object], Callable[[str], bool]], AsyncIterator[Dict[str, object]]]
+
+# Stored abstract outcomes that are fetched again on the next run
+RETRY_ABSTRACT_STATUSES = (ABSTRACT_TIMEOUT, ABSTRACT_ERROR)
+
+
+class UnknownWatch(Exception):
+    """No watch with the given id."""
+
+
+class WatchStore:
+    """
+    SQLite-backed saved queries ("watches") and the documents each one has seen,
+    with the last known status and row of every document.
+    """
+
+    def __init__(self, db_path: str = "jplatpat_watches.sqlite3"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=5.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS watches ("
+            " id TEXT PRIMARY KEY, name TEXT NOT NULL, request TEXT NOT NULL,"
+            " created_at REAL NOT NULL, last_run_at REAL, last_message TEXT NOT NULL DEFAULT '');"
+            "CREATE TABLE IF NOT EXISTS watch_documents ("
+            " watch_id TEXT NOT NULL, document_number TEXT NOT NULL, status TEXT NOT NULL,"
+            " row TEXT NOT NULL, first_seen_at REAL NOT NULL, last_seen_at REAL NOT NULL,"
+            " abstract_status TEXT, PRIMARY KEY (watch_id, document_number));"
+        )
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(watch_documents)").fetchall()]
+        if "abstract_status" not in columns:
+            # Kept next to the row so failed_abstracts does not parse every row
+            self._db.execute("ALTER TABLE watch_documents ADD COLUMN abstract_status TEXT")
+            self._db.execute("UPDATE watch_documents SET abstract_status = json_extract(row, '$.abstract_status')")
+        self._db.commit()
+
+    @classmethod
+    def from_env(cls) -> "WatchStore":
+        return cls(db_path=os.environ.get("WATCH_STORE_PATH", "jplatpat_watches.sqlite3"))
+
+    def create(self, request: Dict[str, object], name: str = "") -> str:
+        watch_id = uuid.uuid4().hex
+        request = {key: request[key] for key in WATCH_REQUEST_FIELDS if key in request}
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO watches (id, name, request, created_at) VALUES (?, ?, ?, ?)",
+                (watch_id, name or str(request["query"]), json.dumps(request, ensure_ascii=False), time.time()),
+            )
+            self._db.commit()
+        return watch_id
+
+    def delete(self, watch_id: str) -> bool:
+        with self._lock:
+            self._db.execute("DELETE FROM watch_documents WHERE watch_id = ?", (watch_id,))
+            deleted = self._db.execute("DELETE FROM watches WHERE id = ?", (watch_id,)).rowcount
+            self._db.commit()
+        return deleted > 0
+
+    def get(self, watch_id: str) -> Optional[Dict[str, object]]:
+        with self._lock:
+            watch = self._db.execute(
+                "SELECT id, name, request, created_at, last_run_at, last_message FROM watches WHERE id = ?", (watch_id,)
+            ).fetchone()
+            if watch is None:
+                return None
+            documents = self._db.execute("SELECT COUNT(*) FROM watch_documents WHERE watch_id = ?", (watch_id,)).fetchone()[0]
+        return {
+            "watch_id": watch[0],
+            "name": watch[1],
+            "request": json.loads(watch[2]),
+            "created_at": watch[3],
+            "last_run_at": watch[4],
+            "last_message": watch[5],
+            "documents": documents,
+        }
+
+    def list_watches(self) -> List[Dict[str, object]]:
+        with self._lock:
+            ids = [row[0] for row in self._db.execute("SELECT id FROM watches ORDER BY created_at").fetchall()]
+        return [watch for watch in (self.get(watch_id) for watch_id in ids) if watch is not None]
+
+    def documents(self, watch_id: str) -> List[Dict[str, object]]:
+        """Every document the watch has seen, newest first, as its last stored row."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT row, first_seen_at, last_seen_at FROM watch_documents WHERE watch_id = ? ORDER BY first_seen_at DESC, document_number",
+                (watch_id,),
+            ).fetchall()
+        return [{**json.loads(r[0]), "first_seen_at": r[1], "last_seen_at": r[2]} for r in rows]
+
+    def known_statuses(self, watch_id: str) -> Dict[str, str]:
+        with self._lock:
+            rows = self._db.execute("SELECT document_number, status FROM watch_documents WHERE watch_id = ?", (watch_id,)).fetchall()
+        return dict(rows)
+
+    def failed_abstracts(self, watch_id: str) -> Set[str]:
+        """Known documents whose abstract fetch timed out or failed, to be fetched again."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT document_number FROM watch_documents WHERE watch_id = ? AND abstract_status IN (%s)" % ",".join("?" * len(RETRY_ABSTRACT_STATUSES)),
+                (watch_id, *RETRY_ABSTRACT_STATUSES),
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def record_run(self, watch_id: str, new_rows: List[Dict[str, object]], seen_rows: List[Dict[str, object]], message: str, ran_at: float) -> None:
+        """
+        Insert `new_rows` and refresh the status and last_seen_at of `seen_rows`
+        (known documents). The stored abstract and claims of known documents are
+        kept unless this run fetched them again (see failed_abstracts).
+        """
+        # Known documents whose stored abstract is kept need the stored row
+        keep = [row["document_number"] for row in seen_rows if row.get("abstract_status") not in (ABSTRACT_OK, ABSTRACT_NONE)]
+        with self._lock, self._db:
+            stored: Dict[str, Dict[str, object]] = {}
+            for start in range(0, len(keep), 500):
+                chunk = keep[start:start + 500]
+                stored.update((doc_num, json.loads(row)) for doc_num, row in self._db.execute(
+                    "SELECT document_number, row FROM watch_documents WHERE watch_id = ? AND document_number IN (%s)" % ",".join("?" * len(chunk)),
+                    (watch_id, *chunk),
+                ))
+            self._db.executemany(
+                "INSERT OR REPLACE INTO watch_documents (watch_id, document_number, status, row, first_seen_at, last_seen_at, abstract_status) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(watch_id, row["document_number"], row["status"], json.dumps(row, ensure_ascii=False), ran_at, ran_at, row.get("abstract_status")) for row in new_rows],
+            )
+            updates = []
+            for row in seen_rows:
+                merged = dict(row)
+                if row["document_number"] in stored:
+                    previous = stored[row["document_number"]]
+                    merged.update({key: previous[key] for key in ("abstract", "abstract_status", "claims") if key in previous})
+                updates.append((row["status"], json.dumps(merged, ensure_ascii=False), ran_at, merged.get("abstract_status"), watch_id, row["document_number"]))
+            self._db.executemany(
+                "UPDATE watch_documents SET status = ?, row = ?, last_seen_at = ?, abstract_status = ? WHERE watch_id = ? AND document_number = ?",
+                updates,
+            )
+            self._db.execute("UPDATE watches SET last_run_at = ?, last_message = ? WHERE id = ?", (ran_at, message, watch_id))
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+async def run_watch(store: WatchStore, watch_id: str, search: WatchSearch) -> Dict[str, object]:
+    """
+    Re-run a watch and return only what changed since its last run: "new" rows
+    (with abstracts) for documents not seen before, and "status_changes" for known
+    documents whose status differs. Detail pages are opened for new documents, and for
+    known ones whose abstract fetch timed out or failed on an earlier run; those that
+    now succeeded are returned in "abstract_updates".
+    Store work runs in worker threads. Raises UnknownWatch for an unknown watch.
+    """
+    watch = await asyncio.to_thread(store.get, watch_id)
+    if watch is None:
+        raise UnknownWatch(watch_id)
+    request = watch["request"]
+    known = await asyncio.to_thread(store.known_statuses, watch_id)
+    retry = await asyncio.to_thread(store.failed_abstracts, watch_id)
+    ran_at = time.time()
+    result = await collect_search_events(search(request, lambda doc_num: doc_num not in known or doc_num in retry), str(request["query"]))
+
+    new_rows: List[Dict[str, object]] = []
+    seen_rows: List[Dict[str, object]] = []
+    status_changes: List[Dict[str, object]] = []
+    abstract_updates: List[Dict[str, object]] = []
+    for row in result["rows"]:
+        doc_num = row["document_number"]
+        if not doc_num:
+            continue
+        if doc_num not in known:
+            new_rows.append(row)
+            known[doc_num] = row["status"]
+            continue
+        seen_rows.append(row)
+        if doc_num in retry and row.get("abstract_status") in (ABSTRACT_OK, ABSTRACT_NONE):
+            abstract_updates.append(row)
+        if row["status"] != known[doc_num]:
+            status_changes.append({"document_number": doc_num, "old_status": known[doc_num], "new_status": row["status"], "row": row})
+    await asyncio.to_thread(store.record_run, watch_id, new_rows, seen_rows, result["message"], ran_at)
+    return {
+        "watch_id": watch_id,
+        "name": watch["name"],
+        "query": request["query"],
+        "ran_at": ran_at,
+        "message": result["message"],
+        "count": result["count"],
+        "new_count": len(new_rows),
+        "new": new_rows,
+        "status_changes": status_changes,
+        "abstract_updates": abstract_updates,
+    }
+
+
+async def _run_watches(store: WatchStore, watch_ids: List[str], headless: bool) -> List[Dict[str, object]]:
+    from browser_pool import BrowserPool
+    from jplatpat_scraper_async import iter_search_jplatpat_async
+    from local_index import index_events
+
+    pool = BrowserPool(browsers=1, contexts_per_browser=1, headless=headless)
+    await pool.start()
+
+    def search(request: Dict[str, object], abstract_filter: Callable[[str], bool]) -> AsyncIterator[Dict[str, object]]:
+        async def events():
+            async with pool.lease() as context:
+                async for event in iter_search_jplatpat_async(
+                    request["query"],
+                    row_limit=request["limit"],
+                    timeout_ms=request.get("timeout", 20000),
+                    fetch_abstract=request.get("fetch_abstract", True),
+                    fetch_claims=request.get("fetch_claims", False),
+                    context=context,
+                    abstract_filter=abstract_filter,
+                ):
+                    yield event
+
+        return index_events(events())
+
+    results = []
+    try:
+        for watch_id in watch_ids:
+            try:
+                results.append(await run_watch(store, watch_id, search))
+            except UnknownWatch:
+                results.append({"watch_id": watch_id, "error": "Watch not found"})
+            except Exception as exc:
+                results.append({"watch_id": watch_id, "error": f"Search failed: {str(exc)}"})
+    finally:
+        await pool.close()
+    return results
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Saved J-PlatPat queries that report only new documents and status changes")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="Save a query as a watch")
+    add.add_argument("query", help="Search string to watch")
+    add.add_argument("--name", default="", help="Display name (defaults to the query)")
+    add.add_argument("--limit", type=int, default=100, help="Number of hits compared on each run")
+    add.add_argument("--timeout", type=int, default=20000, help="Timeout in milliseconds for page waits")
+    add.add_argument("--no-abstract", action="store_false", dest="abstract", help="Do not fetch abstracts of new documents")
+    add.add_argument("--claims", action="store_true", help="Also extract the claims of new documents")
+    sub.add_parser("list", help="List saved watches")
+    run = sub.add_parser("run", help="Re-run watches and print the delta as JSON")
+    run.add_argument("watch_ids", nargs="*", help="Watch ids to run")
+    run.add_argument("--all", action="store_true", help="Run every saved watch")
+    run.add_argument("--headful", action="store_true", help="Run browser in headful mode for debugging")
+    remove = sub.add_parser("remove", help="Delete a watch and its seen documents")
+    remove.add_argument("watch_id")
+    args = parser.parse_args(argv)
+
+    store = WatchStore.from_env()
+    try:
+        if args.command == "add":
+            watch_id = store.create(
+                {"query": args.query, "limit": args.limit, "timeout": args.timeout, "fetch_abstract": args.abstract, "fetch_claims": args.claims},
+                name=args.name,
+            )
+            print(watch_id)
+        elif args.command == "list":
+            print(json.dumps(store.list_watches(), ensure_ascii=False, indent=2))
+        elif args.command == "run":
+            watch_ids = [w["watch_id"] for w in store.list_watches()] if args.all else args.watch_ids
+            if not watch_ids:
+                parser.error("give watch ids or --all")
+            results = asyncio.run(_run_watches(store, watch_ids, headless=not args.headful))
+            print(json.dumps(results, ensure_ascii=False, indent=2))
+            return 1 if any("error" in r for r in results) else 0
+        elif args.command == "remove":
+            if not store.delete(args.watch_id):
+                print(f"error: watch not found: {args.watch_id}", file=sys.stderr)
+                return 1
+        return 0
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))